@@ -6,25 +6,123 @@ Interface browser untuk menggambar dan mengenali tulisan tangan
 from flask import Flask, render_template, request, jsonify
 from flask_cors import CORS
 import numpy as np
-import cv2
 import base64
-from tensorflow.keras.models import load_model
+import json
+import threading
+import hmac
 import os
+import profiling
+from sample_logger import SampleLogger
+from image_preprocessing import (
+    decode_image, rasterize_strokes, ImageTooLargeError, PreprocessBusyError, MAX_IMAGE_BYTES
+)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for production
 
+# Tolak body request yang terlalu besar sebelum di-parse (base64 ~4/3 ukuran asli)
+app.config['MAX_CONTENT_LENGTH'] = MAX_IMAGE_BYTES * 4 // 3 + 64 * 1024
+
 # Load trained model
 MODEL_PATH = 'models/best_model.h5'
 model = None
 
+# Backend inference: 'keras' (default) atau 'numpy' (tanpa TensorFlow,
+# memakai file .npz hasil `python numpy_inference.py export`)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+
+
+def model_file(path):
+    """Path file model sesuai backend inference"""
+    if INFERENCE_BACKEND == 'numpy':
+        return os.path.splitext(path)[0] + '.npz'
+    return path
+
+
+def load_inference_model(path):
+    """Load model dengan backend inference yang dipilih"""
+    if INFERENCE_BACKEND == 'numpy':
+        from numpy_inference import NumpyModel
+        return NumpyModel.load(model_file(path))
+    from tensorflow.keras.models import load_model
+    return load_model(path)
+
+
+# Cascade serving: model kecil menjawab langsung jika confidence >= threshold,
+# selain itu di-eskalasi ke model penuh (lihat calibrate_cascade.py)
+SMALL_MODEL_PATH = 'models/small_model.h5'
+CASCADE_CONFIG_PATH = 'models/cascade.json'
+small_model = None
+cascade_threshold = None
+cascade_stats = {'total': 0, 'escalated': 0}
+cascade_lock = threading.Lock()
+
+
+def load_cascade_model():
+    """Load model kecil dan threshold cascade jika tersedia"""
+    global small_model, cascade_threshold
+    if os.environ.get('CASCADE_ENABLED', '1') == '0':
+        print("Cascade serving dinonaktifkan (CASCADE_ENABLED=0)")
+        return False
+    if not (os.path.exists(model_file(SMALL_MODEL_PATH)) and os.path.exists(CASCADE_CONFIG_PATH)):
+        print("Cascade serving tidak aktif (small model / cascade config tidak ditemukan)")
+        return False
+    
+    with open(CASCADE_CONFIG_PATH) as f:
+        config = json.load(f)
+    cascade_threshold = float(os.environ.get('CASCADE_THRESHOLD', config['threshold']))
+    
+    print(f"Loading small model dari {SMALL_MODEL_PATH}...")
+    small_model = load_inference_model(SMALL_MODEL_PATH)
+    print(f"Cascade serving aktif (threshold={cascade_threshold:.4f})")
+    return True
+
+
+# Sample logger untuk fine-tuning incremental (finetune.py)
+# SAMPLE_LOGGING: 'labeled' (default, hanya request dengan label dari client),
+# 'all' (semua request, untuk finetune.py --pseudo-labels), '0' (nonaktif)
+SAMPLE_LOG_DIR = os.environ.get('SAMPLE_LOG_DIR', 'logs/samples')
+SAMPLE_LOGGING = os.environ.get('SAMPLE_LOGGING', 'labeled')
+sample_logger = SampleLogger(SAMPLE_LOG_DIR) if SAMPLE_LOGGING != '0' else None
+
+
+# Thread topology hasil tune_threads.py (jumlah worker dibaca oleh gunicorn.conf.py)
+SERVING_CONFIG_PATH = os.environ.get('SERVING_CONFIG_PATH', 'models/serving_config.json')
+serving_config = None
+
+
+def apply_serving_config():
+    """Terapkan setting thread TensorFlow dari serving config (sebelum model di-load)"""
+    global serving_config
+    if INFERENCE_BACKEND != 'keras' or not os.path.exists(SERVING_CONFIG_PATH):
+        return False
+    
+    with open(SERVING_CONFIG_PATH) as f:
+        config = json.load(f)
+    
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(config['intra_op_threads'])
+        tf.config.threading.set_inter_op_parallelism_threads(config['inter_op_threads'])
+    except RuntimeError as e:
+        # TensorFlow runtime sudah terinisialisasi, setting thread tidak bisa diubah
+        print(f"Warning: serving config tidak diterapkan: {e}")
+        return False
+    
+    serving_config = {k: config[k] for k in ('workers', 'intra_op_threads', 'inter_op_threads', 'batch_size')}
+    print(f"Serving config diterapkan: {serving_config}")
+    return True
+
+
 def load_trained_model():
     """Load trained model saat aplikasi startup"""
     global model
-    if os.path.exists(MODEL_PATH):
-        print(f"Loading model dari {MODEL_PATH}...")
-        model = load_model(MODEL_PATH)
+    apply_serving_config()
+    if os.path.exists(model_file(MODEL_PATH)):
+        print(f"Loading model dari {model_file(MODEL_PATH)} (backend: {INFERENCE_BACKEND})...")
+        model = load_inference_model(MODEL_PATH)
         print("Model loaded successfully!")
+        load_cascade_model()
         return True
     else:
         print(f"Warning: Model tidak ditemukan di {MODEL_PATH}")
@@ -35,8 +133,9 @@ def load_trained_model():
             from download_model import download_model
             if download_model(MODEL_PATH):
                 print("Mencoba load model yang baru di-download...")
-                model = load_model(MODEL_PATH)
+                model = load_inference_model(MODEL_PATH)
                 print("Model loaded successfully!")
+                load_cascade_model()
                 return True
             else:
                 print("Gagal download model dari cloud storage")
@@ -63,12 +162,8 @@ def preprocess_image(image_data):
     image_data = image_data.split(',')[1]  # Remove "data:image/png;base64," prefix
     image_bytes = base64.b64decode(image_data)
     
-    # Convert ke numpy array
-    nparr = np.frombuffer(image_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
-    
-    # Resize ke 28x28
-    img = cv2.resize(img, (28, 28))
+    # Decode + resize ke 28x28 (gambar besar diproses di process pool)
+    img = decode_image(image_bytes, size=28)
     
     # Invert colors (canvas adalah hitam di background putih, kita butuh putih di background hitam)
     img = 255 - img
@@ -82,6 +177,67 @@ def preprocess_image(image_data):
     return img
 
 
+def preprocess_strokes(data):
+    """
+    Preprocess input stroke vector dari canvas untuk prediksi
+    
+    Args:
+        data: Request JSON dengan key 'strokes' (list stroke berisi titik [x, y]),
+              opsional 'canvas_size' [width, height] dan 'line_width'
+    
+    Returns:
+        Preprocessed image array siap untuk prediksi
+    """
+    canvas_size = data.get('canvas_size', [280, 280])
+    line_width = float(data.get('line_width', 15))
+    
+    img = rasterize_strokes(data['strokes'], canvas_size=canvas_size,
+                            line_width=line_width, size=28)
+    
+    # Reshape untuk model input (sudah putih di background hitam, range [0, 1])
+    return img.reshape(1, 28, 28, 1)
+
+
+def run_inference(processed_image):
+    """
+    Jalankan prediksi, melalui cascade jika model kecil tersedia
+    
+    Args:
+        processed_image: Output dari preprocess_image
+    
+    Returns:
+        Array probabilitas softmax untuk 26 kelas
+    """
+    if small_model is None:
+        return model.predict(processed_image, verbose=0)[0]
+    
+    predictions = small_model.predict(processed_image, verbose=0)[0]
+    escalate = float(predictions.max()) < cascade_threshold
+    if escalate:
+        predictions = model.predict(processed_image, verbose=0)[0]
+    
+    with cascade_lock:
+        cascade_stats['total'] += 1
+        if escalate:
+            cascade_stats['escalated'] += 1
+    
+    return predictions
+
+
+def get_cascade_stats():
+    """Statistik cascade serving untuk health endpoint"""
+    with cascade_lock:
+        total = cascade_stats['total']
+        escalated = cascade_stats['escalated']
+    return {
+        'enabled': small_model is not None,
+        'threshold': cascade_threshold,
+        'total_requests': total,
+        'escalated_requests': escalated,
+        'escalation_rate': escalated / total if total else 0.0
+    }
+
+
 @app.route('/')
 def index():
     """Render halaman utama"""
@@ -90,6 +246,15 @@ def index():
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    """Endpoint /predict, di-profile hanya saat ada capture aktif (/admin/profile)"""
+    capture = profiling.active_capture
+    if capture is None:
+        return handle_predict()
+    with capture.profile_request():
+        return handle_predict()
+
+
+def handle_predict():
     """
     Endpoint untuk prediksi tulisan tangan
     
@@ -97,6 +262,14 @@ def predict():
         {
             "image": "data:image/png;base64,..."
         }
+        atau (stroke vector, dirasterize langsung ke 28x28):
+        {
+            "strokes": [[[x, y], [x, y], ...], ...],
+            "canvas_size": [280, 280],
+            "line_width": 15
+        }
+        Field opsional "label": "A" (huruf yang benar, dari feedback UI)
+        dicatat sebagai sampel berlabel untuk finetune.py.
     
     Response JSON:
         {
@@ -116,24 +289,38 @@ def predict():
         # Get image data dari request
         data = request.get_json()
         image_data = data.get('image')
+        strokes = data.get('strokes')
         
-        if not image_data:
+        if not image_data and not strokes:
             return jsonify({
                 'success': False,
                 'error': 'Tidak ada data gambar'
             }), 400
         
-        # Preprocess image
-        processed_image = preprocess_image(image_data)
+        # Preprocess image (stroke vector langsung di-rasterize, tanpa decode PNG)
+        if strokes:
+            processed_image = preprocess_strokes(data)
+        else:
+            processed_image = preprocess_image(image_data)
         
         # Predict
-        predictions = model.predict(processed_image, verbose=0)[0]
+        predictions = run_inference(processed_image)
         
         # Get predicted class dan confidence
         predicted_class = np.argmax(predictions)
         confidence = float(predictions[predicted_class])
         predicted_letter = chr(65 + predicted_class)  # 65 adalah ASCII code untuk 'A'
         
+        # Log sampel (non-blocking) untuk fine-tuning; 'label' opsional dari client
+        if sample_logger is not None:
+            label = data.get('label')
+            if isinstance(label, str) and len(label) == 1 and 'A' <= label.upper() <= 'Z':
+                label = ord(label.upper()) - 65
+            else:
+                label = None
+            if label is not None or SAMPLE_LOGGING == 'all':
+                sample_logger.log(processed_image, predicted_class, confidence, label)
+        
         # Get top 3 predictions
         top_3_indices = np.argsort(predictions)[-3:][::-1]
         top_3_predictions = {
@@ -148,6 +335,18 @@ def predict():
             'top_predictions': top_3_predictions
         })
         
+    except ImageTooLargeError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 413
+        
+    except PreprocessBusyError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+        
     except Exception as e:
         print(f"Error during prediction: {e}")
         return jsonify({
@@ -161,7 +360,54 @@ def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'running',
-        'model_loaded': model is not None
+        'model_loaded': model is not None,
+        'backend': INFERENCE_BACKEND,
+        'serving_config': serving_config,
+        'cascade': get_cascade_stats(),
+        'sample_logger': sample_logger.get_stats() if sample_logger is not None else None
+    })
+
+
+@app.route('/admin/profile', methods=['GET', 'POST', 'DELETE'])
+def admin_profile():
+    """
+    Endpoint admin untuk capture profiler di worker ini
+    
+    Butuh header X-Admin-Token yang sama dengan env ADMIN_TOKEN; endpoint
+    nonaktif jika ADMIN_TOKEN tidak di-set.
+    
+    POST   {"seconds": 10} atau {"requests": 100}, opsional "tf_trace": false
+    GET    Status capture
+    DELETE Hentikan capture lebih awal dan tulis hasilnya
+    """
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        return jsonify({'success': False, 'error': 'Not found'}), 404
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token):
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    
+    if request.method == 'GET':
+        return jsonify({'success': True, **profiling.capture_status()})
+    
+    if request.method == 'DELETE':
+        result = profiling.stop_capture()
+        return jsonify({'success': True, 'result': result})
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data['seconds']) if data.get('seconds') else None
+        requests_count = int(data['requests']) if data.get('requests') else None
+        tf_trace = bool(data.get('tf_trace', INFERENCE_BACKEND == 'keras'))
+        capture = profiling.start_capture(seconds=seconds, requests=requests_count, tf_trace=tf_trace)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    
+    return jsonify({
+        'success': True,
+        'output_dir': capture.output_dir,
+        'pid': os.getpid()
     })
 
 
@@ -0,0 +1,126 @@
+"""
+Script untuk kalibrasi threshold cascade serving (model kecil -> model penuh)
+Threshold dipilih pada validation set (data/X_val.npy) untuk target accuracy loss
+"""
+
+import os
+import json
+import numpy as np
+
+
+SMALL_MODEL_PATH = 'models/small_model.h5'
+FULL_MODEL_PATH = 'models/best_model.h5'
+CASCADE_CONFIG_PATH = 'models/cascade.json'
+
+
+def calibrate_threshold(small_probs, full_probs, y_true, max_accuracy_loss=0.005):
+    """
+    Cari threshold confidence terendah untuk model kecil
+
+    Sampel dengan max softmax model kecil >= threshold dijawab langsung,
+    sisanya di-eskalasi ke model penuh. Threshold terendah yang accuracy
+    loss-nya (dibanding model penuh saja) masih <= target dipilih, sehingga
+    escalation rate seminimal mungkin.
+
+    Args:
+        small_probs: Softmax output model kecil, shape (n, num_classes)
+        full_probs: Softmax output model penuh, shape (n, num_classes)
+        y_true: Label integer, shape (n,)
+        max_accuracy_loss: Maksimum penurunan accuracy yang diterima (absolut)
+
+    Returns:
+        Dictionary berisi threshold dan statistik kalibrasi
+    """
+    n = len(y_true)
+    small_conf = small_probs.max(axis=1)
+    small_correct = small_probs.argmax(axis=1) == y_true
+    full_correct = full_probs.argmax(axis=1) == y_true
+    full_accuracy = full_correct.mean()
+
+    # Urutkan dari confidence tertinggi: menerima k sampel teratas di stage 1
+    order = np.argsort(-small_conf, kind='stable')
+    conf_sorted = small_conf[order]
+    small_cum = np.concatenate([[0], np.cumsum(small_correct[order])])
+    full_cum = np.concatenate([[0], np.cumsum(full_correct[order])])
+
+    # Akurasi cascade jika k sampel teratas dijawab model kecil
+    cascade_correct = small_cum + (full_cum[-1] - full_cum)
+    cascade_accuracy = cascade_correct / n
+
+    # Threshold hanya bisa memisahkan sampel di batas nilai confidence yang berbeda
+    k = np.arange(n + 1)
+    valid = np.ones(n + 1, dtype=bool)
+    valid[1:n] = conf_sorted[:-1] > conf_sorted[1:]
+    valid &= (full_accuracy - cascade_accuracy) <= max_accuracy_loss
+
+    best_k = int(k[valid].max())
+    if best_k == 0:
+        # Tidak ada sampel yang boleh berhenti di stage 1
+        threshold = float(np.nextafter(np.float32(1.0), np.float32(2.0)))
+    else:
+        threshold = float(conf_sorted[best_k - 1])
+
+    return {
+        'threshold': threshold,
+        'max_accuracy_loss': float(max_accuracy_loss),
+        'full_accuracy': float(full_accuracy),
+        'small_accuracy': float(small_correct.mean()),
+        'cascade_accuracy': float(cascade_accuracy[best_k]),
+        'expected_escalation_rate': float((n - best_k) / n),
+        'num_samples': int(n)
+    }
+
+
+def run_calibration(max_accuracy_loss=0.005, data_dir='data',
+                    small_model_path=SMALL_MODEL_PATH,
+                    full_model_path=FULL_MODEL_PATH,
+                    output_path=CASCADE_CONFIG_PATH):
+    """
+    Kalibrasi threshold cascade pada validation set dan simpan ke JSON
+
+    Args:
+        max_accuracy_loss: Maksimum penurunan accuracy yang diterima (absolut)
+        data_dir: Directory tempat processed data disimpan
+        small_model_path: Path ke model kecil (stage 1)
+        full_model_path: Path ke model penuh (stage 2)
+        output_path: Path output config cascade
+
+    Returns:
+        Dictionary hasil kalibrasi
+    """
+    from tensorflow.keras.models import load_model
+
+    print(f"Loading validation data dari folder '{data_dir}'...")
+    X_val = np.load(os.path.join(data_dir, 'X_val.npy'))
+    y_val = np.load(os.path.join(data_dir, 'y_val.npy')).argmax(axis=1)
+
+    print(f"Loading models: {small_model_path}, {full_model_path}")
+    small_model = load_model(small_model_path)
+    full_model = load_model(full_model_path)
+
+    print("Menjalankan prediksi pada validation set...")
+    small_probs = small_model.predict(X_val, batch_size=512, verbose=0)
+    full_probs = full_model.predict(X_val, batch_size=512, verbose=0)
+
+    result = calibrate_threshold(small_probs, full_probs, y_val, max_accuracy_loss)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print(f"\nCascade config saved to: {output_path}")
+    print(f"  Threshold: {result['threshold']:.4f}")
+    print(f"  Full model accuracy: {result['full_accuracy']*100:.2f}%")
+    print(f"  Small model accuracy: {result['small_accuracy']*100:.2f}%")
+    print(f"  Cascade accuracy: {result['cascade_accuracy']*100:.2f}%")
+    print(f"  Expected escalation rate: {result['expected_escalation_rate']*100:.1f}%")
+
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python calibrate_cascade.py [max_accuracy_loss]
+    max_loss = float(sys.argv[1]) if len(sys.argv) > 1 else 0.005
+    run_calibration(max_accuracy_loss=max_loss)
@@ -0,0 +1,318 @@
+"""
+Near-duplicate detection untuk memperkecil training set
+Dijalankan setelah prepare_data.py (load_and_prepare_data), output ke folder data_dedup/
+
+Setiap gambar 28x28 diberi perceptual hash 64-bit (dHash). Hash di-index
+dengan multi-index hashing: 64 bit dipecah menjadi radius + 1 potongan, dan
+dua hash dengan jarak Hamming <= radius pasti sama persis di minimal satu
+potongan, sehingga lookup cukup lewat dictionary per potongan.
+
+Dedup dilakukan per kelas dengan urutan prioritas test -> val -> train:
+    - near-duplicate lintas split selalu dibuang dari split belakangan
+      (train tidak pernah berisi duplikat sampel val/test)
+    - near-duplicate dalam split yang sama dibuang (mode 'drop') atau,
+      untuk train, diberi bobot 1/ukuran cluster (mode 'weight')
+
+Contoh:
+    python dedup_data.py --radius 4 --mode drop
+    python dedup_data.py --report-epochs 3     # + bandingkan waktu epoch dan test accuracy
+    python train.py --dedup                    # training dari data_dedup/
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+import cv2
+from prepare_data import load_processed_data, ARTIFACT_NAMES
+
+
+SPLITS = ('test', 'val', 'train')
+
+
+def compute_hashes(X):
+    """
+    Hitung dHash 64-bit untuk setiap gambar
+
+    Gambar diperkecil ke 9x8 (area average), lalu setiap bit menyatakan
+    apakah pixel lebih terang dari tetangga kirinya.
+
+    Args:
+        X: Array shape (n, 28, 28, 1) atau (n, 28, 28)
+
+    Returns:
+        Array uint64 shape (n,)
+    """
+    images = X.reshape(len(X), 28, 28).astype('float32')
+    small = np.stack([cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA) for img in images])
+    bits = small[:, :, 1:] > small[:, :, :-1]
+    packed = np.packbits(bits.reshape(len(X), 64), axis=1)
+    return packed.view('>u8').ravel().astype(np.uint64)
+
+
+class MultiIndexHash:
+    """Index hash 64-bit untuk lookup Hamming radius (multi-index hashing)"""
+
+    def __init__(self, radius=4, bits=64):
+        self.radius = radius
+        num_chunks = radius + 1
+        bounds = np.linspace(0, bits, num_chunks + 1).astype(int)
+        self.chunks = [(int(lo), (1 << int(hi - lo)) - 1) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self.tables = [{} for _ in self.chunks]
+        self.codes = {}
+
+    def _keys(self, code):
+        return [(code >> shift) & mask for shift, mask in self.chunks]
+
+    def add(self, code, item_id):
+        code = int(code)
+        self.codes[item_id] = code
+        for table, key in zip(self.tables, self._keys(code)):
+            table.setdefault(key, []).append(item_id)
+
+    def query(self, code):
+        """
+        Cari semua item dengan jarak Hamming <= radius
+
+        Returns:
+            List item_id, urut sesuai urutan insert
+        """
+        code = int(code)
+        candidates = set()
+        for table, key in zip(self.tables, self._keys(code)):
+            candidates.update(table.get(key, ()))
+        return sorted(i for i in candidates if (self.codes[i] ^ code).bit_count() <= self.radius)
+
+
+def find_near_duplicates(hashes, labels, split_ids, radius=4):
+    """
+    Greedy clustering near-duplicate per kelas
+
+    Sampel diproses urut prioritas split (test, val, train); sampel yang
+    punya near-duplicate di antara sampel yang sudah disimpan menjadi anggota
+    cluster sampel tersebut.
+
+    Args:
+        hashes: Array uint64 (n,)
+        labels: Label integer (n,)
+        split_ids: Index split per sampel (0=test, 1=val, 2=train)
+        radius: Maksimum jarak Hamming untuk dianggap duplikat
+
+    Returns:
+        Array representative (n,): index sampel pertama di cluster-nya
+        (sama dengan diri sendiri untuk sampel unik)
+    """
+    representative = np.arange(len(hashes))
+    indexes = {}
+    for i in np.argsort(split_ids, kind='stable'):
+        index = indexes.setdefault(int(labels[i]), MultiIndexHash(radius))
+        matches = index.query(hashes[i])
+        if matches:
+            representative[i] = matches[0]
+        else:
+            index.add(hashes[i], int(i))
+    return representative
+
+
+def cross_split_train_mask(X_train, X_val, X_test, y_train, y_val, y_test, radius=4):
+    """
+    Tandai sampel train yang near-duplicate dengan sampel val/test
+
+    Returns:
+        Array bool (len(X_train),), True untuk sampel train yang bocor lintas split
+    """
+    split_y = {'train': y_train, 'val': y_val, 'test': y_test}
+    X_all = np.concatenate([X_test, X_val, X_train])
+    labels = np.concatenate([split_y[s] for s in SPLITS]).argmax(axis=1)
+    split_ids = np.concatenate([np.full(len(split_y[s]), i) for i, s in enumerate(SPLITS)])
+    representative = find_near_duplicates(compute_hashes(X_all), labels, split_ids, radius)
+    in_train = split_ids == 2
+    return split_ids[representative[in_train]] != 2
+
+
+def deduplicate_splits(X_train, X_val, X_test, y_train, y_val, y_test, radius=4, mode='drop'):
+    """
+    Dedup near-duplicate dalam kelas dan lintas split
+
+    Args:
+        radius: Maksimum jarak Hamming dHash untuk dianggap duplikat
+        mode: 'drop' (buang duplikat) atau 'weight' (duplikat train dalam
+              split yang sama disimpan dengan bobot 1/ukuran cluster)
+
+    Returns:
+        Tuple (arrays, w_train, stats). arrays berurutan seperti
+        load_processed_data; w_train None pada mode 'drop'.
+    """
+    if mode not in ('drop', 'weight'):
+        raise ValueError("mode harus 'drop' atau 'weight'")
+
+    split_X = {'train': X_train, 'val': X_val, 'test': X_test}
+    split_y = {'train': y_train, 'val': y_val, 'test': y_test}
+    X_all = np.concatenate([split_X[s] for s in SPLITS])
+    y_all = np.concatenate([split_y[s] for s in SPLITS])
+    split_ids = np.concatenate([np.full(len(split_y[s]), i) for i, s in enumerate(SPLITS)])
+    labels = y_all.argmax(axis=1)
+
+    print(f"Menghitung perceptual hash untuk {len(X_all):,} sampel...")
+    hashes = compute_hashes(X_all)
+
+    print(f"Mencari near-duplicate (Hamming radius {radius})...")
+    representative = find_near_duplicates(hashes, labels, split_ids, radius)
+
+    unique = representative == np.arange(len(representative))
+    same_split = split_ids[representative] == split_ids
+    keep = unique.copy()
+    weights = np.ones(len(representative), dtype='float32')
+    if mode == 'weight':
+        # Duplikat train dari sampel train lain tetap dipakai, bobot cluster total = 1
+        train_dup = ~unique & same_split & (split_ids == 2)
+        keep |= train_dup
+        members = keep & (split_ids == 2)
+        cluster_sizes = np.bincount(representative[members], minlength=len(representative))
+        weights[members] = 1.0 / cluster_sizes[representative[members]]
+
+    stats = {'radius': radius, 'mode': mode, 'splits': {}}
+    arrays = {}
+    for i, split in enumerate(SPLITS):
+        in_split = split_ids == i
+        mask = keep & in_split
+        arrays[split] = (X_all[mask], y_all[mask])
+        stats['splits'][split] = {
+            'before': int(in_split.sum()),
+            'after': int(mask.sum()),
+            'cross_split_duplicates': int((in_split & ~unique & ~same_split).sum()),
+            'within_split_duplicates': int((in_split & ~unique & same_split).sum())
+        }
+    w_train = weights[keep & (split_ids == 2)] if mode == 'weight' else None
+    if w_train is not None:
+        stats['splits']['train']['effective_samples'] = float(w_train.sum())
+
+    result = (
+        arrays['train'][0], arrays['val'][0], arrays['test'][0],
+        arrays['train'][1], arrays['val'][1], arrays['test'][1]
+    )
+    return result, w_train, stats
+
+
+def _train_epochs(X_train, y_train, X_test, y_test, epochs, batch_size=128, sample_weight=None):
+    """Training singkat dengan augmentasi seperti train.py; mengembalikan waktu epoch dan test accuracy"""
+    import time
+    import tensorflow as tf
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+    from model import create_model
+
+    class EpochTimer(tf.keras.callbacks.Callback):
+        def on_train_begin(self, logs=None):
+            self.times = []
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self._start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.times.append(time.perf_counter() - self._start)
+
+    datagen = ImageDataGenerator(
+        rotation_range=10,
+        width_shift_range=0.1,
+        height_shift_range=0.1,
+        zoom_range=0.1,
+        shear_range=0.1
+    )
+    model = create_model()
+    timer = EpochTimer()
+    model.fit(
+        datagen.flow(X_train, y_train, batch_size=batch_size, sample_weight=sample_weight),
+        epochs=epochs,
+        callbacks=[timer],
+        verbose=1
+    )
+    _, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
+    return float(np.mean(timer.times)), float(test_accuracy)
+
+
+def report_training_effect(original, deduped, w_train=None, epochs=3, radius=4):
+    """
+    Bandingkan waktu epoch dan test accuracy: data asli vs hasil dedup
+
+    Kedua model dievaluasi pada test set hasil dedup. Baseline dilatih pada
+    train asli tanpa near-duplicate sampel val/test; tanpa itu baseline
+    melihat near-copy test set dan accuracy-nya ter-inflate. Dengan begitu
+    selisih accuracy hanya mencerminkan dedup di dalam train.
+    """
+    X_test, y_test = deduped[2], deduped[5]
+    leaked = cross_split_train_mask(*original, radius=radius)
+    X_base, y_base = original[0][~leaked], original[3][~leaked]
+
+    print(f"\n[REPORT] Training {epochs} epoch pada data asli "
+          f"(tanpa {int(leaked.sum()):,} sampel bocor lintas split)...")
+    base_time, base_acc = _train_epochs(X_base, y_base, X_test, y_test, epochs)
+    print(f"\n[REPORT] Training {epochs} epoch pada data dedup...")
+    dedup_time, dedup_acc = _train_epochs(deduped[0], deduped[3], X_test, y_test, epochs,
+                                          sample_weight=w_train)
+
+    report = {
+        'epochs': epochs,
+        'train_samples': {'original': int(len(X_base)), 'dedup': int(len(deduped[0]))},
+        'baseline_removed_cross_split': int(leaked.sum()),
+        'epoch_seconds': {'original': base_time, 'dedup': dedup_time},
+        'epoch_time_reduction': 1 - dedup_time / base_time,
+        'test_accuracy': {'original': base_acc, 'dedup': dedup_acc},
+        'test_accuracy_delta': dedup_acc - base_acc
+    }
+    print("\n" + "="*60)
+    print("DEDUP TRAINING EFFECT")
+    print("="*60)
+    print(f"Epoch time: {base_time:.1f}s -> {dedup_time:.1f}s "
+          f"({report['epoch_time_reduction']*100:.1f}% lebih cepat)")
+    print(f"Test accuracy: {base_acc*100:.2f}% -> {dedup_acc*100:.2f}% "
+          f"({report['test_accuracy_delta']*100:+.2f} pp)")
+    print("="*60)
+    return report
+
+
+def run_dedup(data_dir='data', output_dir='data_dedup', radius=4, mode='drop', report_epochs=0):
+    """
+    Jalankan dedup stage dan simpan hasil ke output_dir
+
+    Returns:
+        Dictionary statistik (dan report training jika report_epochs > 0)
+    """
+    original = load_processed_data(data_dir)
+    deduped, w_train, stats = deduplicate_splits(*original, radius=radius, mode=mode)
+
+    print(f"\nHasil dedup ({mode}, radius {radius}):")
+    for split in ('train', 'val', 'test'):
+        s = stats['splits'][split]
+        shrink = 1 - s['after'] / s['before'] if s['before'] else 0.0
+        print(f"  {split:>5}: {s['before']:,} -> {s['after']:,} sampel ({shrink*100:.1f}% lebih kecil, "
+              f"{s['cross_split_duplicates']:,} bocor lintas split)")
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, arr in zip(ARTIFACT_NAMES, deduped):
+        np.save(os.path.join(output_dir, f'{name}.npy'), arr)
+    w_path = os.path.join(output_dir, 'w_train.npy')
+    if w_train is not None:
+        np.save(w_path, w_train)
+    elif os.path.exists(w_path):
+        os.remove(w_path)
+
+    if report_epochs:
+        stats['training_report'] = report_training_effect(original, deduped, w_train, report_epochs, radius)
+
+    with open(os.path.join(output_dir, 'dedup_report.json'), 'w') as f:
+        json.dump(stats, f, indent=2)
+    print(f"\nData dedup disimpan ke folder '{output_dir}'")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Near-duplicate dedup untuk dataset A-Z')
+    parser.add_argument('--radius', type=int, default=4, help='Maksimum jarak Hamming dHash 64-bit')
+    parser.add_argument('--mode', choices=('drop', 'weight'), default='drop')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output-dir', default='data_dedup')
+    parser.add_argument('--report-epochs', type=int, default=0,
+                        help='Jika > 0, bandingkan waktu epoch dan test accuracy (training N epoch)')
+    args = parser.parse_args()
+
+    run_dedup(args.data_dir, args.output_dir, args.radius, args.mode, args.report_epochs)
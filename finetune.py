@@ -0,0 +1,232 @@
+"""
+Fine-tuning incremental dari sampel production (logs/samples) tanpa full retrain
+Mulai dari models/best_model.h5, campur sampel baru dengan replay subset data asli
+
+Secara default hanya sampel yang punya label dari client (field "label"
+di /predict, dikirim tombol feedback di UI web) yang dipakai. Dengan
+--pseudo-labels, sampel tanpa label juga dipakai untuk training dengan
+prediksi model saat ini sebagai label (hanya jika confidence >=
+--min-confidence, dan app.py harus dijalankan dengan SAMPLE_LOGGING=all);
+sinyalnya kecil karena model hanya belajar ulang jawabannya sendiri.
+
+Holdout untuk membandingkan candidate dengan model saat ini hanya diambil
+dari sampel berlabel client (berdasarkan hash isi, stabil antar run), karena
+pada pseudo-label model saat ini selalu benar. Tanpa sampel berlabel,
+accuracy production_holdout di report bernilai null.
+
+Output:
+    models/candidate_model.h5      - model hasil fine-tuning
+    models/candidate_report.json   - perbandingan accuracy current vs candidate
+"""
+
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime
+import numpy as np
+from sample_logger import read_samples, UNKNOWN_LABEL
+
+
+CANDIDATE_MODEL_PATH = 'models/candidate_model.h5'
+CANDIDATE_REPORT_PATH = 'models/candidate_report.json'
+
+
+def load_logged_samples(log_dir='logs/samples', use_pseudo_labels=False, min_confidence=0.9):
+    """
+    Load sampel production sebagai data training
+
+    Args:
+        log_dir: Folder log SampleLogger
+        use_pseudo_labels: Ikutkan sampel tanpa label dengan prediksi sebagai label
+        min_confidence: Minimum confidence untuk pseudo-label
+
+    Returns:
+        Tuple (X, y, labeled_mask): X float32 (n, 28, 28, 1), y one-hot (n, 26),
+        labeled_mask True untuk sampel dengan label dari client
+    """
+    records = read_samples(log_dir)
+    labeled = records['label'] != UNKNOWN_LABEL
+    keep = labeled
+    if use_pseudo_labels:
+        keep = labeled | (records['confidence'] >= int(round(min_confidence * 255)))
+    records = records[keep]
+    labeled = records['label'] != UNKNOWN_LABEL
+
+    labels = np.where(labeled, records['label'], records['predicted']).astype(int)
+    X = records['pixels'].reshape(-1, 28, 28, 1).astype('float32') / 255.0
+    y = np.eye(26, dtype='float32')[labels]
+    return X, y, labeled
+
+
+def holdout_mask(X, holdout_fraction=0.2):
+    """Pilih holdout berdasarkan hash isi sampel (stabil meskipun log bertambah)"""
+    pixels = np.rint(X.reshape(len(X), -1) * 255).astype(np.uint8)
+    u = np.array([
+        int.from_bytes(hashlib.blake2b(row.tobytes(), digest_size=8).digest(), 'little') / 2**64
+        for row in pixels
+    ])
+    return u < holdout_fraction
+
+
+def load_replay_subset(num_samples, data_dir='data', seed=42):
+    """Ambil subset acak training data asli (memory map, tidak load semua)"""
+    X_train = np.load(os.path.join(data_dir, 'X_train.npy'), mmap_mode='r')
+    y_train = np.load(os.path.join(data_dir, 'y_train.npy'), mmap_mode='r')
+    num_samples = min(num_samples, len(X_train))
+    indices = np.sort(np.random.default_rng(seed).choice(len(X_train), num_samples, replace=False))
+    return np.asarray(X_train[indices]), np.asarray(y_train[indices])
+
+
+def finetune(model_path='models/best_model.h5', log_dir='logs/samples', data_dir='data',
+             epochs=3, batch_size=128, learning_rate=1e-4, replay_ratio=4.0,
+             use_pseudo_labels=False, min_confidence=0.9, holdout_fraction=0.2, min_samples=100,
+             output_path=CANDIDATE_MODEL_PATH, report_path=CANDIDATE_REPORT_PATH):
+    """
+    Fine-tune model saat ini dengan sampel production + replay data asli
+
+    Args:
+        model_path: Model awal (model production saat ini)
+        log_dir: Folder log SampleLogger
+        data_dir: Folder processed data asli (untuk replay dan test set)
+        epochs: Jumlah epoch fine-tuning
+        batch_size: Batch size
+        learning_rate: Learning rate Adam (lebih kecil dari training awal)
+        replay_ratio: Jumlah sampel replay per sampel baru
+        use_pseudo_labels: Ikutkan sampel tanpa label dengan prediksi sebagai label
+        min_confidence: Minimum confidence untuk pseudo-label
+        holdout_fraction: Proporsi sampel berlabel client untuk evaluasi
+        min_samples: Minimum sampel baru untuk menjalankan fine-tuning
+
+    Returns:
+        Dictionary report, atau None jika sampel baru belum cukup
+    """
+    from tensorflow import keras
+    from tensorflow.keras.models import load_model
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+    print("="*60)
+    print("HANDWRITING RECOGNITION - INCREMENTAL FINE-TUNING")
+    print("="*60)
+
+    print(f"\n[1/5] Loading logged samples dari '{log_dir}'...")
+    X_new, y_new, labeled = load_logged_samples(log_dir, use_pseudo_labels, min_confidence)
+    print(f"Sampel baru: {len(X_new):,} ({int(labeled.sum()):,} berlabel, "
+          f"{int((~labeled).sum()):,} pseudo-label)")
+    if len(X_new) < min_samples:
+        if not use_pseudo_labels and not labeled.any():
+            print("Belum ada sampel berlabel client (field 'label' di /predict).")
+        print(f"Sampel baru kurang dari {min_samples}, fine-tuning di-skip.")
+        return None
+
+    # Holdout hanya dari sampel berlabel client (pseudo-label = jawaban model saat ini)
+    holdout = labeled & holdout_mask(X_new, holdout_fraction)
+    X_new_train, y_new_train = X_new[~holdout], y_new[~holdout]
+    X_holdout, y_holdout = X_new[holdout], y_new[holdout]
+
+    print("\n[2/5] Loading replay subset data asli...")
+    X_replay, y_replay = load_replay_subset(int(len(X_new_train) * replay_ratio), data_dir)
+    X_train = np.concatenate([X_new_train, X_replay])
+    y_train = np.concatenate([y_new_train, y_replay])
+    print(f"Training set: {len(X_new_train):,} baru + {len(X_replay):,} replay")
+
+    print(f"\n[3/5] Loading model awal dari {model_path}...")
+    current_model = load_model(model_path)
+    model = load_model(model_path)
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    print(f"\n[4/5] Fine-tuning {epochs} epoch...")
+    datagen = ImageDataGenerator(
+        rotation_range=10,
+        width_shift_range=0.1,
+        height_shift_range=0.1,
+        zoom_range=0.1,
+        shear_range=0.1
+    )
+    model.fit(
+        datagen.flow(X_train, y_train, batch_size=batch_size),
+        epochs=epochs,
+        verbose=1
+    )
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    model.save(output_path)
+    print(f"Candidate model saved to: {output_path}")
+
+    print("\n[5/5] Membandingkan current vs candidate...")
+    X_test = np.load(os.path.join(data_dir, 'X_test.npy'), mmap_mode='r')
+    y_test = np.load(os.path.join(data_dir, 'y_test.npy'), mmap_mode='r')
+
+    def accuracy(m, X, y):
+        if len(X) == 0:
+            return None
+        return float((m.predict(X, batch_size=512, verbose=0).argmax(axis=1) == y.argmax(axis=1)).mean())
+
+    report = {
+        'model_path': model_path,
+        'candidate_path': output_path,
+        'new_samples': {
+            'train': int(len(X_new_train)),
+            'holdout': int(len(X_holdout)),
+            'labeled': int(labeled.sum())
+        },
+        'pseudo_labels': use_pseudo_labels,
+        'replay_samples': int(len(X_replay)),
+        'epochs': epochs,
+        'learning_rate': learning_rate,
+        'accuracy': {
+            'original_test': {
+                'current': accuracy(current_model, X_test, y_test),
+                'candidate': accuracy(model, X_test, y_test)
+            },
+            'production_holdout': {
+                'current': accuracy(current_model, X_holdout, y_holdout),
+                'candidate': accuracy(model, X_holdout, y_holdout)
+            }
+        },
+        'generated_at': datetime.now().isoformat(timespec='seconds')
+    }
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "="*60)
+    print("ACCURACY COMPARISON")
+    print("="*60)
+    for name, values in report['accuracy'].items():
+        if values['current'] is None:
+            print(f"{name}: tidak ada sampel")
+            continue
+        print(f"{name}: current {values['current']*100:.2f}% -> candidate {values['candidate']*100:.2f}% "
+              f"({(values['candidate'] - values['current'])*100:+.2f} pp)")
+    print("="*60)
+    print(f"Report saved to: {report_path}")
+    print("Jika candidate lebih baik, ganti models/best_model.h5 dengan candidate model.")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Incremental fine-tuning dari sampel production')
+    parser.add_argument('--model', default='models/best_model.h5')
+    parser.add_argument('--log-dir', default='logs/samples')
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--learning-rate', type=float, default=1e-4)
+    parser.add_argument('--replay-ratio', type=float, default=4.0,
+                        help='Jumlah sampel replay data asli per sampel baru')
+    parser.add_argument('--pseudo-labels', action='store_true',
+                        help='Ikutkan sampel tanpa label dengan prediksi model sebagai label')
+    parser.add_argument('--min-confidence', type=float, default=0.9,
+                        help='Minimum confidence untuk sampel tanpa label (pseudo-label)')
+    args = parser.parse_args()
+
+    finetune(
+        model_path=args.model,
+        log_dir=args.log_dir,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        replay_ratio=args.replay_ratio,
+        use_pseudo_labels=args.pseudo_labels,
+        min_confidence=args.min_confidence
+    )
@@ -0,0 +1,27 @@
+"""
+Konfigurasi gunicorn
+Jumlah worker diambil dari models/serving_config.json (hasil tune_threads.py) jika ada
+Model di-load di setiap worker lewat post_worker_init (app.load_trained_model)
+"""
+
+import os
+import json
+
+workers = 2
+threads = 4
+
+_serving_config_path = os.environ.get('SERVING_CONFIG_PATH', 'models/serving_config.json')
+if os.path.exists(_serving_config_path):
+    with open(_serving_config_path) as f:
+        workers = int(json.load(f).get('workers', workers))
+
+# Process pool decode (image_preprocessing.py) dibuat per worker; bagi core
+# antar worker agar total proses tidak menjadi workers x cpu_count
+if 'PREPROCESS_WORKERS' not in os.environ:
+    raw_env = [f"PREPROCESS_WORKERS={max(1, (os.cpu_count() or 1) // workers)}"]
+
+
+def post_worker_init(worker):
+    """Load model (dan terapkan thread TF dari serving config) di setiap worker"""
+    import app
+    app.load_trained_model()
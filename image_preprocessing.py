@@ -0,0 +1,238 @@
+"""
+Preprocessing stage untuk gambar yang di-upload ke /predict
+Decode dengan resolusi tereduksi dan process pool untuk scan berukuran besar
+
+Gambar seukuran canvas di-decode langsung di request thread seperti biasa.
+Gambar besar (mis. foto 12 megapixel) di-decode di process pool terbatas
+dengan scale-on-decode (cv2.IMREAD_REDUCED_GRAYSCALE_*), sehingga worker
+tidak memegang CPU/GIL lama dan request canvas lain tetap responsif.
+
+Input stroke vector dari canvas di-rasterize langsung ke 28x28
+(rasterize_strokes) tanpa PNG sama sekali.
+"""
+
+import io
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import numpy as np
+import cv2
+from PIL import Image
+
+
+# Batas ukuran upload (bytes hasil decode base64 dan dimensi gambar)
+MAX_IMAGE_BYTES = int(os.environ.get('MAX_IMAGE_BYTES', 16 * 1024 * 1024))
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 40_000_000))
+MAX_IMAGE_SIDE = int(os.environ.get('MAX_IMAGE_SIDE', 10000))
+
+# Gambar di bawah batas ini (bytes dan pixel) di-decode inline di request thread
+INLINE_DECODE_BYTES = int(os.environ.get('INLINE_DECODE_BYTES', 256 * 1024))
+INLINE_DECODE_PIXELS = int(os.environ.get('INLINE_DECODE_PIXELS', 1024 * 1024))
+
+# Process pool untuk decode berat, satu pool per proses; di bawah gunicorn
+# default PREPROCESS_WORKERS = cpu_count // workers (lihat gunicorn.conf.py)
+PREPROCESS_WORKERS = int(os.environ.get('PREPROCESS_WORKERS', os.cpu_count() or 1))
+PREPROCESS_QUEUE_SIZE = int(os.environ.get('PREPROCESS_QUEUE_SIZE', 2 * PREPROCESS_WORKERS))
+PREPROCESS_TIMEOUT = float(os.environ.get('PREPROCESS_TIMEOUT', 30))
+
+# Batas jumlah titik untuk input stroke vector
+MAX_STROKE_POINTS = int(os.environ.get('MAX_STROKE_POINTS', 10000))
+
+# Sisi terpendek minimum setelah reduced decode (sebelum resize akhir ke 28x28)
+REDUCED_MIN_SIDE = 112
+
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(PREPROCESS_QUEUE_SIZE)
+
+
+class ImageTooLargeError(ValueError):
+    """Gambar melebihi batas bytes atau dimensi"""
+
+
+class PreprocessBusyError(RuntimeError):
+    """Process pool penuh, request harus dicoba lagi nanti"""
+
+
+def probe_image_size(image_bytes):
+    """
+    Baca dimensi gambar dari header saja (tanpa decode pixel)
+
+    Returns:
+        Tuple (width, height)
+
+    Raises:
+        ImageTooLargeError: Pillow menolak gambar sebagai decompression bomb
+        ValueError: Format gambar tidak dikenali
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            return img.size
+    except Image.DecompressionBombError as e:
+        raise ImageTooLargeError(f"Dimensi gambar melebihi batas: {e}")
+    except Exception as e:
+        raise ValueError(f"Format gambar tidak dikenali: {e}")
+
+
+def decode_reduced(image_bytes, width, height, size=28):
+    """
+    Decode gambar besar ke grayscale size x size dengan scale-on-decode
+
+    JPEG di-decode langsung pada 1/2, 1/4, atau 1/8 resolusi oleh libjpeg;
+    format lain di-decode lalu diperkecil oleh OpenCV.
+    Fungsi ini dijalankan di process pool, jadi harus tetap top-level.
+    """
+    flag = cv2.IMREAD_GRAYSCALE
+    for factor, reduced_flag in _REDUCED_FLAGS:
+        if min(width, height) // factor >= REDUCED_MIN_SIDE:
+            flag = reduced_flag
+            break
+
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    img = cv2.imdecode(nparr, flag)
+    if img is None:
+        raise ValueError("Gagal decode gambar")
+    return cv2.resize(img, (size, size), interpolation=cv2.INTER_AREA)
+
+
+def decode_inline(image_bytes, size=28):
+    """Decode gambar kecil (seukuran canvas) langsung di request thread"""
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise ValueError("Gagal decode gambar")
+    return cv2.resize(img, (size, size))
+
+
+def get_pool():
+    """Process pool dibuat lazily saat upload besar pertama"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: aman untuk parent yang sudah memuat TensorFlow (thread pool aktif)
+            _pool = ProcessPoolExecutor(
+                max_workers=PREPROCESS_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def decode_image(image_bytes, size=28):
+    """
+    Decode bytes gambar menjadi array grayscale uint8 (size, size)
+
+    Args:
+        image_bytes: Bytes file gambar (PNG/JPEG/...)
+        size: Sisi output
+
+    Returns:
+        Array uint8 shape (size, size)
+
+    Raises:
+        ImageTooLargeError: Bytes atau dimensi melebihi batas
+        PreprocessBusyError: Process pool penuh
+        ValueError: Gambar tidak bisa di-decode
+    """
+    if len(image_bytes) > MAX_IMAGE_BYTES:
+        raise ImageTooLargeError(
+            f"Ukuran gambar {len(image_bytes):,} bytes melebihi batas {MAX_IMAGE_BYTES:,} bytes"
+        )
+
+    width, height = probe_image_size(image_bytes)
+    if max(width, height) > MAX_IMAGE_SIDE or width * height > MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(
+            f"Dimensi gambar {width}x{height} melebihi batas "
+            f"({MAX_IMAGE_SIDE}px per sisi, {MAX_IMAGE_PIXELS:,} pixel)"
+        )
+
+    if len(image_bytes) <= INLINE_DECODE_BYTES and width * height <= INLINE_DECODE_PIXELS:
+        return decode_inline(image_bytes, size)
+
+    if not _pool_slots.acquire(blocking=False):
+        raise PreprocessBusyError("Server sedang memproses terlalu banyak gambar besar, coba lagi")
+    try:
+        future = get_pool().submit(decode_reduced, image_bytes, width, height, size)
+    except BaseException:
+        _pool_slots.release()
+        raise
+    # Slot baru dilepas saat job selesai (bukan saat request timeout), karena
+    # job yang sudah berjalan di pool tidak bisa dibatalkan
+    future.add_done_callback(lambda _: _pool_slots.release())
+    try:
+        return future.result(timeout=PREPROCESS_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        raise PreprocessBusyError("Timeout saat memproses gambar")
+
+
+def rasterize_strokes(strokes, canvas_size=(280, 280), line_width=15.0, size=28, aa_width=2.0):
+    """
+    Rasterize stroke canvas langsung ke size x size tanpa decode PNG
+
+    Setiap pasangan titik berurutan adalah satu segmen garis dengan
+    lineCap/lineJoin 'round' (sama seperti ctx.stroke() di script.js),
+    sehingga tinta = union kapsul dengan radius line_width / 2. Nilai pixel
+    adalah coverage anti-aliased pada pusat pixel target, diukur dalam
+    koordinat canvas, jadi ketebalan garis ikut terskala proporsional.
+    Hasilnya mendekati jalur PNG (canvas 280 -> cv2.resize 28 -> invert).
+
+    Args:
+        strokes: List stroke, masing-masing list titik [x, y] koordinat canvas
+        canvas_size: (width, height) canvas di client
+        line_width: ctx.lineWidth di client (pixel canvas)
+        size: Sisi output
+        aa_width: Lebar transisi anti-aliasing (pixel canvas); default 2 karena
+                  cv2.resize bilinear 10x di jalur PNG merata-rata 2x2 pixel canvas
+
+    Returns:
+        Array float32 shape (size, size), tinta = 1.0, background = 0.0
+    """
+    canvas_w, canvas_h = float(canvas_size[0]), float(canvas_size[1])
+    if canvas_w <= 0 or canvas_h <= 0 or line_width <= 0:
+        raise ValueError("canvas_size dan line_width harus positif")
+
+    segments = []
+    total_points = 0
+    for stroke in strokes:
+        points = np.asarray(stroke, dtype='float32').reshape(-1, 2)
+        total_points += len(points)
+        if total_points > MAX_STROKE_POINTS:
+            raise ImageTooLargeError(f"Jumlah titik stroke melebihi batas {MAX_STROKE_POINTS:,}")
+        # Titik tunggal tidak menghasilkan garis di canvas (draw() butuh gerakan)
+        if len(points) >= 2:
+            segments.append(np.concatenate([points[:-1], points[1:]], axis=1))
+
+    image = np.zeros((size, size), dtype='float32')
+    if not segments:
+        return image
+    segments = np.concatenate(segments, axis=0)
+    if not np.all(np.isfinite(segments)):
+        raise ValueError("Koordinat stroke tidak valid")
+
+    # Pusat pixel target dalam koordinat canvas
+    xs = (np.arange(size, dtype='float32') + 0.5) * (canvas_w / size)
+    ys = (np.arange(size, dtype='float32') + 0.5) * (canvas_h / size)
+    px, py = np.meshgrid(xs, ys)
+    px, py = px.reshape(-1, 1), py.reshape(-1, 1)
+
+    # Jarak minimum tiap pixel ke semua segmen, diproses per chunk agar memori terbatas
+    min_dist_sq = np.full((size * size, 1), np.inf, dtype='float32')
+    for start in range(0, len(segments), 512):
+        x0, y0, x1, y1 = segments[start:start + 512].T
+        dx, dy = x1 - x0, y1 - y0
+        length_sq = dx * dx + dy * dy
+        t = ((px - x0) * dx + (py - y0) * dy) / np.maximum(length_sq, 1e-12)
+        np.clip(t, 0.0, 1.0, out=t)
+        dist_sq = (px - (x0 + t * dx)) ** 2 + (py - (y0 + t * dy)) ** 2
+        np.minimum(min_dist_sq, dist_sq.min(axis=1, keepdims=True), out=min_dist_sq)
+
+    coverage = (line_width / 2.0 - np.sqrt(min_dist_sq)) / aa_width + 0.5
+    return np.clip(coverage, 0.0, 1.0).reshape(size, size)
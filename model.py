@@ -9,13 +9,14 @@ from tensorflow.keras import layers, models
 from tensorflow.keras.regularizers import l2
 
 
-def create_model(input_shape=(28, 28, 1), num_classes=26):
+def create_model(input_shape=(28, 28, 1), num_classes=26, learning_rate=0.001):
     """
     Membuat CNN model untuk handwriting recognition
     
     Args:
         input_shape: Shape input gambar (height, width, channels)
         num_classes: Jumlah kelas output (26 untuk A-Z)
+        learning_rate: Learning rate Adam optimizer
     
     Returns:
         Compiled Keras model
@@ -62,6 +63,45 @@ def create_model(input_shape=(28, 28, 1), num_classes=26):
     ])
     
     # Compile model
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    
+    return model
+
+
+def create_small_model(input_shape=(28, 28, 1), num_classes=26):
+    """
+    Membuat CNN kecil untuk stage pertama cascade serving
+    
+    Model ini jauh lebih ringan dari create_model sehingga huruf yang mudah
+    bisa dijawab langsung; input yang tidak yakin di-eskalasi ke model penuh.
+    
+    Args:
+        input_shape: Shape input gambar (height, width, channels)
+        num_classes: Jumlah kelas output (26 untuk A-Z)
+    
+    Returns:
+        Compiled Keras model
+    """
+    model = models.Sequential([
+        layers.Input(shape=input_shape),
+        
+        layers.Conv2D(16, (3, 3), activation='relu', padding='same'),
+        layers.MaxPooling2D((2, 2)),
+        
+        layers.Conv2D(32, (3, 3), activation='relu', padding='same'),
+        layers.MaxPooling2D((2, 2)),
+        
+        layers.Flatten(),
+        layers.Dense(64, activation='relu'),
+        layers.Dropout(0.3),
+        
+        layers.Dense(num_classes, activation='softmax')
+    ])
+    
     model.compile(
         optimizer=keras.optimizers.Adam(learning_rate=0.001),
         loss='categorical_crossentropy',
@@ -83,3 +123,6 @@ if __name__ == "__main__":
     print("\nModel Summary:")
     model.summary()
     print(f"\nTotal parameters: {model.count_params():,}")
+    
+    small_model = create_small_model()
+    print(f"Small (cascade) model parameters: {small_model.count_params():,}")
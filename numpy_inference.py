@@ -0,0 +1,353 @@
+"""
+Pure-NumPy inference engine untuk CNN handwriting recognition
+Menjalankan arsitektur create_model (Conv2D/BatchNorm/MaxPool/Dense) tanpa TensorFlow
+
+Alur:
+    1. Export weights dari Keras sekali (butuh TensorFlow):
+           python numpy_inference.py export models/best_model.h5
+    2. Di edge box / container minimal cukup NumPy:
+           from numpy_inference import NumpyModel
+           model = NumpyModel.load('models/best_model.npz')
+           probs = model.predict(images)
+"""
+
+import os
+import json
+import numpy as np
+
+
+SUPPORTED_LAYERS = ('Conv2D', 'BatchNormalization', 'MaxPooling2D', 'Dropout', 'Flatten', 'Dense')
+
+
+def export_numpy_weights(model_path='models/best_model.h5', output_path=None):
+    """
+    Export arsitektur + weights model Keras ke file .npz
+
+    Args:
+        model_path: Path ke model Keras (.h5)
+        output_path: Path output .npz (default: sama dengan model_path)
+
+    Returns:
+        Path file .npz yang ditulis
+    """
+    from tensorflow.keras.models import load_model
+
+    if output_path is None:
+        output_path = os.path.splitext(model_path)[0] + '.npz'
+
+    model = load_model(model_path)
+    architecture = {'input_shape': list(model.input_shape[1:]), 'layers': []}
+    arrays = {}
+
+    for i, layer in enumerate(model.layers):
+        class_name = layer.__class__.__name__
+        if class_name not in SUPPORTED_LAYERS:
+            raise ValueError(f"Layer {layer.name} ({class_name}) tidak didukung NumPy engine")
+
+        config = layer.get_config()
+        spec = {'type': class_name}
+        if class_name in ('Conv2D', 'Dense'):
+            spec['activation'] = config['activation']
+        if class_name == 'Conv2D':
+            spec['padding'] = config['padding']
+            spec['strides'] = list(config['strides'])
+        if class_name == 'MaxPooling2D':
+            spec['pool_size'] = list(config['pool_size'])
+            spec['strides'] = list(config['strides'] or config['pool_size'])
+            spec['padding'] = config['padding']
+        if class_name == 'BatchNormalization':
+            spec['epsilon'] = config['epsilon']
+
+        weights = layer.get_weights()
+        spec['num_weights'] = len(weights)
+        for j, w in enumerate(weights):
+            arrays[f'layer{i}_w{j}'] = w.astype('float32')
+        architecture['layers'].append(spec)
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    np.savez(output_path, __architecture__=np.array(json.dumps(architecture)), **arrays)
+    print(f"NumPy weights exported to: {output_path}")
+    return output_path
+
+
+def _pad_same(x, kernel_size, strides):
+    """Zero padding ala Keras padding='same' untuk input NHWC"""
+    _, h, w, _ = x.shape
+    pads = []
+    for size, k, s in ((h, kernel_size[0], strides[0]), (w, kernel_size[1], strides[1])):
+        out = -(-size // s)
+        total = max((out - 1) * s + k - size, 0)
+        pads.append((total // 2, total - total // 2))
+    return np.pad(x, ((0, 0), pads[0], pads[1], (0, 0)))
+
+
+def _im2col(x, kernel_size, strides):
+    """
+    Ubah input NHWC menjadi matrix patch (N, H_out, W_out, kh*kw*C)
+
+    Urutan kolom (kh, kw, C) sama dengan layout kernel Keras sehingga
+    konvolusi cukup satu matmul dengan kernel.reshape(-1, C_out).
+    """
+    kh, kw = kernel_size
+    sh, sw = strides
+    _, h, w, _ = x.shape
+    h_out = (h - kh) // sh + 1
+    w_out = (w - kw) // sw + 1
+    patches = [
+        x[:, i:i + sh * (h_out - 1) + 1:sh, j:j + sw * (w_out - 1) + 1:sw, :]
+        for i in range(kh) for j in range(kw)
+    ]
+    return np.concatenate(patches, axis=-1)
+
+
+def _activation(x, name):
+    if name == 'relu':
+        return np.maximum(x, 0, out=x)
+    if name == 'softmax':
+        x = x - x.max(axis=-1, keepdims=True)
+        np.exp(x, out=x)
+        x /= x.sum(axis=-1, keepdims=True)
+        return x
+    if name == 'linear':
+        return x
+    raise ValueError(f"Activation {name} tidak didukung NumPy engine")
+
+
+class NumpyModel:
+    """
+    CNN inference engine berbasis NumPy/BLAS
+
+    BatchNormalization di create_model berada SETELAH ReLU, sehingga tidak
+    bisa di-fold ke conv/dense sebelumnya secara exact. Saat load, affine
+    BatchNorm (scale, shift per channel) di-fold ke layer linear BERIKUTNYA:
+    scale dikalikan ke kernel, shift menjadi bias (untuk Conv2D 'same' berupa
+    bias map per posisi agar zero padding tetap exact). Affine didorong
+    melewati MaxPool bila semua scale > 0; selain itu diterapkan langsung.
+    Dropout adalah no-op saat inference.
+    """
+
+    def __init__(self, ops, input_shape):
+        self.ops = ops
+        self.input_shape = tuple(input_shape)
+
+    @classmethod
+    def load(cls, path='models/best_model.npz'):
+        """Load file .npz hasil export_numpy_weights dan compile ops"""
+        with np.load(path) as data:
+            architecture = json.loads(str(data['__architecture__']))
+            arrays = {k: data[k] for k in data.files if k != '__architecture__'}
+
+        input_shape = architecture['input_shape']
+        shape = list(input_shape)  # (H, W, C) atau (features,)
+        ops = []
+        pending = None  # (scale, shift) per channel yang belum diterapkan
+
+        def materialize():
+            nonlocal pending
+            if pending is not None:
+                ops.append(('affine', pending[0], pending[1]))
+                pending = None
+
+        for i, spec in enumerate(architecture['layers']):
+            weights = [arrays[f'layer{i}_w{j}'] for j in range(spec['num_weights'])]
+            kind = spec['type']
+
+            if kind == 'Dropout':
+                continue
+
+            if kind == 'BatchNormalization':
+                gamma, beta, mean, var = weights
+                scale = gamma / np.sqrt(var + spec['epsilon'])
+                shift = beta - mean * scale
+                if pending is not None:
+                    scale, shift = pending[0] * scale, pending[1] * scale + shift
+                pending = (scale.astype('float32'), shift.astype('float32'))
+
+            elif kind == 'Conv2D':
+                kernel = weights[0]
+                bias = weights[1] if len(weights) > 1 else np.zeros(kernel.shape[-1], 'float32')
+                kernel_size = kernel.shape[:2]
+                strides = tuple(spec['strides'])
+                h, w, _ = shape
+                conv = {'kernel_size': kernel_size, 'strides': strides, 'padding': spec['padding']}
+
+                bias_term = bias
+                if pending is not None:
+                    scale, shift = pending
+                    kernel = kernel * scale[None, None, :, None]
+                    # Shift input yang di-pad nol: hitung kontribusinya sebagai bias map
+                    const = np.broadcast_to(shift, (1, h, w, shift.shape[0])).astype('float32')
+                    bias_term = _conv_forward(const, weights[0].reshape(-1, weights[0].shape[-1]),
+                                              0.0, conv)[0] + bias
+                    pending = None
+
+                conv['matrix'] = np.ascontiguousarray(kernel.reshape(-1, kernel.shape[-1]), 'float32')
+                conv['bias'] = bias_term.astype('float32')
+                ops.append(('conv', conv))
+                ops.append(('activation', spec['activation']))
+
+                if spec['padding'] == 'same':
+                    shape = [-(-h // strides[0]), -(-w // strides[1]), kernel.shape[-1]]
+                else:
+                    shape = [(h - kernel_size[0]) // strides[0] + 1,
+                             (w - kernel_size[1]) // strides[1] + 1, kernel.shape[-1]]
+
+            elif kind == 'MaxPooling2D':
+                pool_size, strides = tuple(spec['pool_size']), tuple(spec['strides'])
+                if pool_size != strides or spec['padding'] != 'valid':
+                    raise ValueError("NumPy engine hanya mendukung MaxPooling2D non-overlap padding 'valid'")
+                # max(a*x + b) = a*max(x) + b hanya jika a > 0
+                if pending is not None and not np.all(pending[0] > 0):
+                    materialize()
+                ops.append(('maxpool', pool_size))
+                shape = [shape[0] // pool_size[0], shape[1] // pool_size[1], shape[2]]
+
+            elif kind == 'Flatten':
+                ops.append(('flatten',))
+                if pending is not None:
+                    # Flatten NHWC: channel paling dalam, tile per posisi spasial
+                    reps = int(np.prod(shape[:-1]))
+                    pending = (np.tile(pending[0], reps), np.tile(pending[1], reps))
+                shape = [int(np.prod(shape))]
+
+            elif kind == 'Dense':
+                kernel = weights[0]
+                bias = weights[1] if len(weights) > 1 else np.zeros(kernel.shape[-1], 'float32')
+                if pending is not None:
+                    scale, shift = pending
+                    bias = bias + shift @ kernel
+                    kernel = kernel * scale[:, None]
+                    pending = None
+                ops.append(('dense', np.ascontiguousarray(kernel, 'float32'), bias.astype('float32')))
+                ops.append(('activation', spec['activation']))
+                shape = [kernel.shape[-1]]
+
+        materialize()
+        return cls(ops, input_shape)
+
+    def _forward(self, x):
+        for op in self.ops:
+            kind = op[0]
+            if kind == 'conv':
+                x = _conv_forward(x, op[1]['matrix'], op[1]['bias'], op[1])
+            elif kind == 'dense':
+                x = x @ op[1]
+                x += op[2]
+            elif kind == 'activation':
+                x = _activation(x, op[1])
+            elif kind == 'affine':
+                x = x * op[1] + op[2]
+            elif kind == 'maxpool':
+                ph, pw = op[1]
+                n, h, w, c = x.shape
+                h, w = h // ph, w // pw
+                x = x[:, :h * ph, :w * pw].reshape(n, h, ph, w, pw, c).max(axis=(2, 4))
+            elif kind == 'flatten':
+                x = x.reshape(x.shape[0], -1)
+        return x
+
+    def predict(self, x, batch_size=256, verbose=0):
+        """
+        Forward pass batched (API mirip Keras model.predict)
+
+        Args:
+            x: Array float32 shape (N, 28, 28, 1) dengan nilai [0, 1]
+            batch_size: Jumlah sampel per forward pass
+            verbose: Diabaikan, untuk kompatibilitas dengan Keras
+
+        Returns:
+            Array probabilitas softmax shape (N, num_classes)
+        """
+        x = np.asarray(x, dtype='float32').reshape((-1,) + self.input_shape)
+        outputs = [self._forward(x[i:i + batch_size]) for i in range(0, len(x), batch_size)]
+        return np.concatenate(outputs, axis=0)
+
+
+def _conv_forward(x, matrix, bias, conv):
+    """Conv2D via im2col + satu matmul (BLAS)"""
+    if conv['padding'] == 'same':
+        x = _pad_same(x, conv['kernel_size'], conv['strides'])
+    cols = _im2col(x, conv['kernel_size'], conv['strides'])
+    out = cols @ matrix
+    out += bias
+    return out
+
+
+def check_parity(model_path='models/best_model.h5', npz_path=None, num_samples=512, atol=1e-4):
+    """
+    Bandingkan output NumpyModel dengan Keras model.predict
+
+    Memakai data/X_test.npy jika ada, selain itu input random.
+
+    Returns:
+        Maximum absolute difference probabilitas
+    """
+    from tensorflow.keras.models import load_model
+
+    if npz_path is None:
+        npz_path = os.path.splitext(model_path)[0] + '.npz'
+    if not os.path.exists(npz_path):
+        export_numpy_weights(model_path, npz_path)
+
+    x = _sample_inputs(num_samples)
+    keras_probs = load_model(model_path).predict(x, batch_size=256, verbose=0)
+    numpy_probs = NumpyModel.load(npz_path).predict(x)
+
+    max_diff = float(np.abs(keras_probs - numpy_probs).max())
+    agreement = float((keras_probs.argmax(axis=1) == numpy_probs.argmax(axis=1)).mean())
+    print(f"Max abs difference: {max_diff:.2e} (atol={atol:.0e})")
+    print(f"Top-1 agreement: {agreement*100:.2f}%")
+    if max_diff > atol:
+        raise AssertionError(f"NumPy engine tidak sesuai dengan Keras (max diff {max_diff:.2e})")
+    print("Parity OK!")
+    return max_diff
+
+
+def benchmark(model_path='models/best_model.h5', npz_path=None, num_samples=2048, batch_size=256):
+    """Bandingkan throughput NumpyModel.predict dengan Keras model.predict"""
+    import time
+    from tensorflow.keras.models import load_model
+
+    if npz_path is None:
+        npz_path = os.path.splitext(model_path)[0] + '.npz'
+    if not os.path.exists(npz_path):
+        export_numpy_weights(model_path, npz_path)
+
+    x = _sample_inputs(num_samples)
+    results = {}
+    for name, engine in (('keras', load_model(model_path)), ('numpy', NumpyModel.load(npz_path))):
+        engine.predict(x[:batch_size], batch_size=batch_size, verbose=0)  # warmup
+        start = time.perf_counter()
+        engine.predict(x, batch_size=batch_size, verbose=0)
+        elapsed = time.perf_counter() - start
+        results[name] = num_samples / elapsed
+        print(f"{name:>6}: {results[name]:,.0f} images/s (batch_size={batch_size})")
+
+    print(f"Speedup NumPy vs Keras: {results['numpy'] / results['keras']:.2f}x")
+    return results
+
+
+def _sample_inputs(num_samples):
+    test_path = os.path.join('data', 'X_test.npy')
+    if os.path.exists(test_path):
+        x = np.load(test_path, mmap_mode='r')[:num_samples]
+        return np.asarray(x, dtype='float32')
+    rng = np.random.default_rng(42)
+    return rng.random((num_samples, 28, 28, 1), dtype='float32')
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python numpy_inference.py [export|check|bench] [model_path]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'check'
+    path = sys.argv[2] if len(sys.argv) > 2 else 'models/best_model.h5'
+
+    if command == 'export':
+        export_numpy_weights(path)
+    elif command == 'check':
+        check_parity(path)
+    elif command == 'bench':
+        benchmark(path)
+    else:
+        print("Usage: python numpy_inference.py [export|check|bench] [model_path]")
@@ -6,17 +6,164 @@ Download manual dataset dari: https://www.kaggle.com/datasets/sachinpatel21/az-h
 import pandas as pd
 import numpy as np
 import os
+import json
+import hashlib
+from datetime import datetime
 from sklearn.model_selection import train_test_split
 import pickle
 
 
-def load_and_prepare_data(csv_path='A_Z Handwritten Data.csv', save_dir='data'):
+MANIFEST_NAME = 'manifest.json'
+CACHE_VERSION = 1
+ARTIFACT_NAMES = ['X_train', 'X_val', 'X_test', 'y_train', 'y_val', 'y_test']
+
+
+def hash_file(path, prefix_size=None, chunk_size=8 * 1024 * 1024):
+    """
+    Hitung SHA-256 file, sekaligus hash prefix sepanjang prefix_size bytes
+    
+    Prefix hash dipakai untuk mendeteksi CSV yang hanya ditambah baris baru
+    di akhir (isi lama tidak berubah).
+    
+    Returns:
+        Tuple (full_sha256, prefix_sha256 atau None)
+    """
+    digest = hashlib.sha256()
+    prefix_digest = None
+    read = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            if prefix_size is not None and read < prefix_size <= read + len(chunk):
+                digest.update(chunk[:prefix_size - read])
+                prefix_digest = digest.copy().hexdigest()
+                digest.update(chunk[prefix_size - read:])
+            else:
+                digest.update(chunk)
+            read += len(chunk)
+    if prefix_size == 0:
+        prefix_digest = hashlib.sha256().hexdigest()
+    return digest.hexdigest(), prefix_digest
+
+
+def read_manifest(save_dir='data'):
+    """
+    Baca manifest build cache dari save_dir
+    
+    Returns:
+        Dictionary manifest, atau None jika belum ada
+    """
+    path = os.path.join(save_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def artifact_status(manifest, save_dir='data'):
+    """
+    Cek artifact mana yang masih sesuai manifest (ada dan ukurannya cocok)
+    
+    Returns:
+        Dictionary {nama_file: True jika current}
+    """
+    status = {}
+    for name in ARTIFACT_NAMES:
+        filename = f'{name}.npy'
+        path = os.path.join(save_dir, filename)
+        info = (manifest or {}).get('artifacts', {}).get(filename)
+        status[filename] = bool(
+            info and os.path.exists(path) and os.path.getsize(path) == info['size']
+        )
+    return status
+
+
+def _save_artifacts(save_dir, arrays):
+    """Simpan array .npy dan kembalikan info artifact untuk manifest"""
+    os.makedirs(save_dir, exist_ok=True)
+    artifacts = {}
+    for name, arr in zip(ARTIFACT_NAMES, arrays):
+        filename = f'{name}.npy'
+        path = os.path.join(save_dir, filename)
+        np.save(path, arr)
+        artifacts[filename] = {
+            'shape': list(arr.shape),
+            'dtype': str(arr.dtype),
+            'size': os.path.getsize(path),
+            'sha256': hash_file(path)[0]
+        }
+    return artifacts
+
+
+def _write_manifest(save_dir, manifest):
+    path = os.path.join(save_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _load_artifacts(save_dir):
+    return tuple(np.load(os.path.join(save_dir, f'{name}.npy')) for name in ARTIFACT_NAMES)
+
+
+def _to_arrays(df):
+    """Pisahkan DataFrame CSV menjadi X (n, 28, 28, 1) float32 dan y one-hot"""
+    # Column 0 adalah label (0-25 untuk A-Z)
+    # Column 1-784 adalah pixel values (28x28 = 784)
+    y = df.iloc[:, 0].values
+    X = df.iloc[:, 1:].values
+    
+    # Reshape X dari (n, 784) menjadi (n, 28, 28, 1)
+    X = X.reshape(-1, 28, 28, 1)
+    
+    # Normalize pixel values ke range [0, 1]
+    X = X.astype('float32') / 255.0
+    
+    # Convert labels ke categorical (one-hot encoding)
+    from tensorflow.keras.utils import to_categorical
+    y = to_categorical(y, num_classes=26)
+    return X, y
+
+
+def _hash_split(X, test_size, val_size):
+    """
+    Assignment split deterministik berdasarkan isi sampel (untuk data delta)
+    
+    Sampel yang sama selalu masuk split yang sama, tidak tergantung urutan
+    atau ukuran delta, jadi assignment yang sudah ada tidak pernah berubah.
+    
+    Returns:
+        Array string 'train' / 'val' / 'test' per sampel
+    """
+    pixels = np.round(X.reshape(len(X), -1) * 255).astype(np.uint8)
+    u = np.array([
+        int.from_bytes(hashlib.blake2b(row.tobytes(), digest_size=8).digest(), 'little') / 2**64
+        for row in pixels
+    ])
+    val_cut = test_size + (1 - test_size) * val_size
+    return np.where(u < test_size, 'test', np.where(u < val_cut, 'val', 'train'))
+
+
+def load_and_prepare_data(csv_path='A_Z Handwritten Data.csv', save_dir='data',
+                          test_size=0.15, val_size=0.176, random_state=42, use_cache=True):
     """
     Load dan prepare dataset dari CSV
     
+    Hasil build di-cache dengan key hash CSV + parameter split (lihat
+    data/manifest.json). Jika tidak ada yang berubah, file .npy tidak ditulis
+    ulang. Jika CSV hanya ditambah baris baru di akhir, hanya delta yang
+    di-parse dan di-split; assignment sampel lama tetap sama.
+    
     Args:
         csv_path: Path ke file CSV dataset
         save_dir: Directory untuk save processed data
+        test_size: Proporsi test set dari total data
+        val_size: Proporsi validation set dari sisa data setelah test split
+        random_state: Random seed untuk split
+        use_cache: Gunakan build cache (False = selalu build penuh)
     
     Returns:
         Tuple of (X_train, X_val, X_test, y_train, y_val, y_test)
@@ -32,37 +179,48 @@ def load_and_prepare_data(csv_path='A_Z Handwritten Data.csv', save_dir='data'):
             "Dan letakkan file 'A_Z Handwritten Data.csv' di folder project ini."
         )
     
+    params = {
+        'test_size': test_size,
+        'val_size': val_size,
+        'random_state': random_state,
+        'version': CACHE_VERSION
+    }
+    
+    # Manifest lama hanya bisa dipakai jika parameter sama dan semua artifact current
+    manifest = read_manifest(save_dir) if use_cache else None
+    if manifest and (manifest.get('params') != params
+                     or not all(artifact_status(manifest, save_dir).values())):
+        manifest = None
+    old_source = manifest['source'] if manifest else None
+    
+    source_size = os.path.getsize(csv_path)
+    prefix_size = old_source['size'] if old_source and old_source['size'] <= source_size else None
+    source_sha, prefix_sha = hash_file(csv_path, prefix_size=prefix_size)
+    
+    if old_source and source_sha == old_source['sha256']:
+        print(f"Build cache up to date ({MANIFEST_NAME}), skip preprocessing.")
+        return _load_artifacts(save_dir)
+    
+    if old_source and prefix_sha == old_source['sha256'] and prefix_size < source_size:
+        return _append_delta(csv_path, save_dir, manifest, source_sha, source_size, params)
+    
     # Load CSV
     df = pd.read_csv(csv_path)
     print(f"Dataset loaded: {df.shape[0]:,} sampel")
     
-    # Separate features and labels
-    # Column 0 adalah label (0-25 untuk A-Z)
-    # Column 1-784 adalah pixel values (28x28 = 784)
-    y = df.iloc[:, 0].values
-    X = df.iloc[:, 1:].values
-    
-    # Reshape X dari (n, 784) menjadi (n, 28, 28, 1)
-    X = X.reshape(-1, 28, 28, 1)
-    
-    # Normalize pixel values ke range [0, 1]
-    X = X.astype('float32') / 255.0
+    X, y = _to_arrays(df)
     
     print(f"Data shape: {X.shape}")
     print(f"Labels shape: {y.shape}")
-    print(f"Labels range: {y.min()} to {y.max()}")
-    
-    # Convert labels ke categorical (one-hot encoding)
-    from tensorflow.keras.utils import to_categorical
-    y = to_categorical(y, num_classes=26)
+    print(f"Labels range: {y.argmax(axis=1).min()} to {y.argmax(axis=1).max()}")
     
     # Split data: 70% train, 15% validation, 15% test
     X_train_val, X_test, y_train_val, y_test = train_test_split(
-        X, y, test_size=0.15, random_state=42, stratify=y.argmax(axis=1)
+        X, y, test_size=test_size, random_state=random_state, stratify=y.argmax(axis=1)
     )
     
     X_train, X_val, y_train, y_val = train_test_split(
-        X_train_val, y_train_val, test_size=0.176, random_state=42, 
+        X_train_val, y_train_val, test_size=val_size, random_state=random_state, 
         stratify=y_train_val.argmax(axis=1)  # 0.176 * 0.85 ≈ 0.15 of total
     )
     
@@ -71,21 +229,70 @@ def load_and_prepare_data(csv_path='A_Z Handwritten Data.csv', save_dir='data'):
     print(f"  Validation: {X_val.shape[0]:,} sampel")
     print(f"  Test: {X_test.shape[0]:,} sampel")
     
-    # Create save directory
-    os.makedirs(save_dir, exist_ok=True)
-    
     # Save processed data
     print(f"\nSaving processed data ke folder '{save_dir}'...")
-    np.save(os.path.join(save_dir, 'X_train.npy'), X_train)
-    np.save(os.path.join(save_dir, 'X_val.npy'), X_val)
-    np.save(os.path.join(save_dir, 'X_test.npy'), X_test)
-    np.save(os.path.join(save_dir, 'y_train.npy'), y_train)
-    np.save(os.path.join(save_dir, 'y_val.npy'), y_val)
-    np.save(os.path.join(save_dir, 'y_test.npy'), y_test)
+    arrays = (X_train, X_val, X_test, y_train, y_val, y_test)
+    artifacts = _save_artifacts(save_dir, arrays)
+    
+    _write_manifest(save_dir, {
+        'source': {
+            'path': os.path.abspath(csv_path),
+            'sha256': source_sha,
+            'size': source_size,
+            'rows': int(df.shape[0])
+        },
+        'params': params,
+        'segments': [{'mode': 'full', 'sha256': source_sha, 'size': source_size, 'rows': int(df.shape[0])}],
+        'artifacts': artifacts,
+        'built_at': datetime.now().isoformat(timespec='seconds')
+    })
     
     print("Data berhasil diproses dan disimpan!")
     
-    return X_train, X_val, X_test, y_train, y_val, y_test
+    return arrays
+
+
+def _append_delta(csv_path, save_dir, manifest, source_sha, source_size, params):
+    """Parse hanya baris baru di akhir CSV, split, dan append ke artifact lama"""
+    old_size = manifest['source']['size']
+    with open(csv_path, 'rb') as f:
+        f.seek(old_size - 1)
+        if f.read(1) != b'\n':
+            # Baris terakhir lama tidak diakhiri newline: batas delta ambigu
+            print("Batas delta CSV tidak jelas, build ulang penuh...")
+            return load_and_prepare_data(csv_path, save_dir, params['test_size'], params['val_size'],
+                                         params['random_state'], use_cache=False)
+        df = pd.read_csv(f, header=None)
+    print(f"CSV bertambah {df.shape[0]:,} sampel baru, memproses delta saja...")
+    
+    X_new, y_new = _to_arrays(df)
+    assignment = _hash_split(X_new, params['test_size'], params['val_size'])
+    
+    X_train, X_val, X_test, y_train, y_val, y_test = _load_artifacts(save_dir)
+    split_arrays = {'train': (X_train, y_train), 'val': (X_val, y_val), 'test': (X_test, y_test)}
+    for split in ('train', 'val', 'test'):
+        mask = assignment == split
+        X_old, y_old = split_arrays[split]
+        split_arrays[split] = (np.concatenate([X_old, X_new[mask]]), np.concatenate([y_old, y_new[mask]]))
+        print(f"  {split}: +{int(mask.sum()):,} sampel")
+    
+    arrays = (
+        split_arrays['train'][0], split_arrays['val'][0], split_arrays['test'][0],
+        split_arrays['train'][1], split_arrays['val'][1], split_arrays['test'][1]
+    )
+    artifacts = _save_artifacts(save_dir, arrays)
+    
+    rows = manifest['source']['rows'] + int(df.shape[0])
+    manifest['source'].update({'sha256': source_sha, 'size': source_size, 'rows': rows})
+    manifest['segments'].append({
+        'mode': 'delta', 'sha256': source_sha, 'size': source_size, 'rows': int(df.shape[0])
+    })
+    manifest['artifacts'] = artifacts
+    manifest['built_at'] = datetime.now().isoformat(timespec='seconds')
+    _write_manifest(save_dir, manifest)
+    
+    print("Delta berhasil diproses dan disimpan!")
+    return arrays
 
 
 def load_processed_data(save_dir='data'):
@@ -100,6 +307,12 @@ def load_processed_data(save_dir='data'):
     """
     print(f"Loading processed data dari folder '{save_dir}'...")
     
+    manifest = read_manifest(save_dir)
+    if manifest is not None:
+        stale = [name for name, current in artifact_status(manifest, save_dir).items() if not current]
+        if stale:
+            print(f"Warning: artifact tidak sesuai manifest: {', '.join(stale)}")
+    
     X_train = np.load(os.path.join(save_dir, 'X_train.npy'))
     X_val = np.load(os.path.join(save_dir, 'X_val.npy'))
     X_test = np.load(os.path.join(save_dir, 'X_test.npy'))
@@ -0,0 +1,251 @@
+"""
+On-demand profiler capture untuk worker yang sedang berjalan
+Dipicu lewat endpoint admin /admin/profile di app.py
+
+Satu capture berjalan selama N detik atau N request /predict, lalu menulis:
+    cpu.speedscope.json  - sampling CPU profile thread request (buka di https://www.speedscope.app)
+    cpu.pstats           - cProfile per request, digabung (python -m pstats cpu.pstats)
+    tf/                  - TensorFlow profiler trace (tensorboard --logdir <dir>/tf)
+
+Saat tidak ada capture, biaya di request path hanya satu pengecekan `active_capture is None`.
+"""
+
+import os
+import sys
+import json
+import time
+import cProfile
+import pstats
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+MAX_CAPTURE_SECONDS = 300
+MAX_CAPTURE_REQUESTS = 10000
+SAMPLE_INTERVAL = 0.005
+
+# Capture yang sedang aktif di proses ini (None = profiling mati)
+active_capture = None
+_capture_lock = threading.Lock()
+_last_result = None
+
+
+class ProfileCapture:
+    """Satu sesi capture: sampler thread, cProfile per request, dan TF trace"""
+
+    def __init__(self, output_dir, seconds=None, requests=None, tf_trace=True,
+                 interval=SAMPLE_INTERVAL):
+        self.output_dir = output_dir
+        self.seconds = seconds
+        self.max_requests = requests
+        self.tf_trace = tf_trace
+        self.interval = interval
+
+        self.request_count = 0
+        self.started_at = None
+        self.stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._request_threads = set()
+        self._stats = None
+        self._frames = {}
+        self._frame_list = []
+        self._samples = []
+        self._weights = []
+        self._sampler = None
+        self._timer = None
+        self._tf_started = False
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.started_at = time.perf_counter()
+
+        if self.tf_trace:
+            try:
+                import tensorflow as tf
+                tf.profiler.experimental.start(os.path.join(self.output_dir, 'tf'))
+                self._tf_started = True
+            except Exception as e:
+                print(f"TensorFlow profiler tidak bisa dijalankan: {e}")
+
+        self._sampler = threading.Thread(target=self._sample_loop, name='profile-sampler', daemon=True)
+        self._sampler.start()
+
+        if self.seconds:
+            self._timer = threading.Timer(self.seconds, stop_capture)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @contextmanager
+    def profile_request(self):
+        """Profile satu request: daftarkan thread ke sampler dan jalankan cProfile"""
+        thread_id = threading.get_ident()
+        profiler = cProfile.Profile()
+        with self._lock:
+            self._request_threads.add(thread_id)
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self._request_threads.discard(thread_id)
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+                self.request_count += 1
+                done = self.max_requests and self.request_count >= self.max_requests
+            if done:
+                # Tulis hasil di thread lain agar request terakhir tidak ikut lambat
+                threading.Thread(target=stop_capture, daemon=True).start()
+
+    def _frame_index(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frames.get(key)
+        if index is None:
+            index = len(self._frame_list)
+            self._frames[key] = index
+            self._frame_list.append({'name': key[0], 'file': key[1], 'line': key[2]})
+        return index
+
+    def _sample_loop(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            with self._lock:
+                thread_ids = list(self._request_threads)
+            if not thread_ids:
+                continue
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_index(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    # speedscope: urutan root -> leaf
+                    self._samples.append(stack[::-1])
+                    self._weights.append(elapsed)
+
+    def stop(self):
+        """Hentikan capture dan tulis semua file; mengembalikan ringkasan"""
+        self.stopped.set()
+        if self._timer:
+            self._timer.cancel()
+        if self._sampler and self._sampler is not threading.current_thread():
+            self._sampler.join()
+        duration = time.perf_counter() - self.started_at
+
+        if self._tf_started:
+            try:
+                import tensorflow as tf
+                tf.profiler.experimental.stop()
+            except Exception as e:
+                print(f"Gagal menghentikan TensorFlow profiler: {e}")
+
+        files = {}
+        speedscope_path = os.path.join(self.output_dir, 'cpu.speedscope.json')
+        with open(speedscope_path, 'w') as f:
+            json.dump({
+                '$schema': 'https://www.speedscope.app/file-format-schema.json',
+                'name': f'predict pid {os.getpid()}',
+                'exporter': 'handwriting-recognition profiling.py',
+                'shared': {'frames': self._frame_list},
+                'profiles': [{
+                    'type': 'sampled',
+                    'name': 'request threads',
+                    'unit': 'seconds',
+                    'startValue': 0,
+                    'endValue': sum(self._weights),
+                    'samples': self._samples,
+                    'weights': self._weights
+                }]
+            }, f)
+        files['speedscope'] = speedscope_path
+
+        with self._lock:
+            stats = self._stats
+        if stats is not None:
+            pstats_path = os.path.join(self.output_dir, 'cpu.pstats')
+            stats.dump_stats(pstats_path)
+            files['pstats'] = pstats_path
+        if self._tf_started:
+            files['tensorflow_trace'] = os.path.join(self.output_dir, 'tf')
+
+        return {
+            'output_dir': self.output_dir,
+            'pid': os.getpid(),
+            'duration_seconds': round(duration, 3),
+            'requests': self.request_count,
+            'samples': len(self._samples),
+            'files': files
+        }
+
+
+def start_capture(seconds=None, requests=None, tf_trace=True):
+    """
+    Mulai capture baru di proses ini
+
+    Args:
+        seconds: Durasi capture (detik)
+        requests: Jumlah request /predict yang di-capture
+        tf_trace: Ikut jalankan TensorFlow profiler
+
+    Returns:
+        ProfileCapture yang aktif
+
+    Raises:
+        ValueError: Parameter tidak valid
+        RuntimeError: Capture lain masih berjalan
+    """
+    global active_capture
+    if not seconds and not requests:
+        raise ValueError("Tentukan 'seconds' atau 'requests'")
+    if seconds and not 0 < seconds <= MAX_CAPTURE_SECONDS:
+        raise ValueError(f"'seconds' harus di antara 0 dan {MAX_CAPTURE_SECONDS}")
+    if requests and not 0 < requests <= MAX_CAPTURE_REQUESTS:
+        raise ValueError(f"'requests' harus di antara 1 dan {MAX_CAPTURE_REQUESTS}")
+
+    with _capture_lock:
+        if active_capture is not None:
+            raise RuntimeError("Capture lain masih berjalan")
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output_dir = os.path.join(PROFILE_DIR, f'{timestamp}-pid{os.getpid()}')
+        capture = ProfileCapture(output_dir, seconds=seconds, requests=requests, tf_trace=tf_trace)
+        capture.start()
+        active_capture = capture
+    print(f"Profiler capture dimulai: {output_dir}")
+    return capture
+
+
+def stop_capture():
+    """Hentikan capture aktif (jika ada) dan simpan hasilnya"""
+    global active_capture, _last_result
+    with _capture_lock:
+        capture = active_capture
+        active_capture = None
+    if capture is None:
+        return None
+    result = capture.stop()
+    _last_result = result
+    print(f"Profiler capture selesai: {result['output_dir']}")
+    return result
+
+
+def capture_status():
+    """Status capture untuk endpoint admin"""
+    capture = active_capture
+    if capture is None:
+        return {'active': False, 'last_result': _last_result}
+    return {
+        'active': True,
+        'output_dir': capture.output_dir,
+        'pid': os.getpid(),
+        'requests': capture.request_count,
+        'elapsed_seconds': round(time.perf_counter() - capture.started_at, 3),
+        'last_result': _last_result
+    }
@@ -0,0 +1,189 @@
+"""
+Non-blocking logger untuk sampel dari traffic /predict
+Sampel dipakai finetune.py untuk fine-tuning incremental
+
+Request thread hanya memasukkan referensi array ke queue terbatas
+(put_nowait); konversi ke uint8 dan penulisan file dilakukan oleh satu
+background thread. Jika queue penuh, sampel dibuang (dihitung di stats)
+sehingga latency request tidak pernah terpengaruh.
+
+Format file: logs/samples/samples-YYYYMMDD-<pid>.bin, record fixed-size 792 bytes:
+    uint32 timestamp | uint8 predicted class | uint8 confidence (x255)
+    | uint8 label (255 = tidak diketahui) | uint8 reserved | 784 bytes pixel 28x28
+
+Total ukuran log_dir dibatasi SAMPLE_LOG_MAX_BYTES; file tertua dihapus
+lebih dulu saat batas terlampaui.
+"""
+
+import os
+import time
+import queue
+import struct
+import atexit
+import threading
+from datetime import datetime
+import numpy as np
+
+
+RECORD_HEADER = struct.Struct('<IBBBB')
+RECORD_SIZE = RECORD_HEADER.size + 28 * 28
+UNKNOWN_LABEL = 255
+SAMPLE_LOG_MAX_BYTES = int(os.environ.get('SAMPLE_LOG_MAX_BYTES', 256 * 1024 * 1024))
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<u4'),
+    ('predicted', 'u1'),
+    ('confidence', 'u1'),
+    ('label', 'u1'),
+    ('reserved', 'u1'),
+    ('pixels', 'u1', (28, 28))
+])
+
+
+class SampleLogger:
+    """Bounded queue + background writer untuk sampel 28x28"""
+
+    def __init__(self, log_dir='logs/samples', max_queue=1024, flush_interval=1.0,
+                 max_bytes=SAMPLE_LOG_MAX_BYTES):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.stats = {'logged': 0, 'written': 0, 'dropped': 0, 'rotated_files': 0}
+        self._thread = threading.Thread(target=self._run, name='sample-logger', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, image, predicted, confidence, label=None):
+        """
+        Catat satu sampel tanpa blocking
+
+        Args:
+            image: Array float [0, 1] shape (1, 28, 28, 1) hasil preprocessing
+            predicted: Index kelas prediksi (0-25)
+            confidence: Confidence prediksi [0, 1]
+            label: Label benar jika diketahui (0-25), selain itu None
+
+        Returns:
+            True jika sampel masuk queue
+        """
+        try:
+            self._queue.put_nowait((int(time.time()), image, predicted, confidence, label))
+        except queue.Full:
+            with self._stats_lock:
+                self.stats['dropped'] += 1
+            return False
+        with self._stats_lock:
+            self.stats['logged'] += 1
+        return True
+
+    def get_stats(self):
+        with self._stats_lock:
+            return dict(self.stats, queue_size=self._queue.qsize(), log_dir=self.log_dir,
+                        max_bytes=self.max_bytes)
+
+    def _encode(self, item):
+        timestamp, image, predicted, confidence, label = item
+        pixels = np.clip(np.rint(np.asarray(image).reshape(28, 28) * 255), 0, 255).astype(np.uint8)
+        header = RECORD_HEADER.pack(
+            timestamp, int(predicted), int(round(float(confidence) * 255)),
+            UNKNOWN_LABEL if label is None else int(label), 0
+        )
+        return header + pixels.tobytes()
+
+    def _enforce_limit(self, incoming):
+        """
+        Hapus file log tertua sampai total + incoming <= max_bytes
+
+        Direktori di-scan ulang setiap kali karena worker gunicorn lain
+        menulis ke folder yang sama.
+
+        Returns:
+            True jika masih ada ruang untuk incoming bytes
+        """
+        files = []
+        for name in os.listdir(self.log_dir):
+            if name.endswith('.bin'):
+                path = os.path.join(self.log_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+        files.sort()
+        total = sum(size for _, _, size in files)
+
+        removed = 0
+        for _, path, size in files:
+            if total + incoming <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        if removed:
+            with self._stats_lock:
+                self.stats['rotated_files'] += removed
+        return total + incoming <= self.max_bytes
+
+    def _write(self, items):
+        os.makedirs(self.log_dir, exist_ok=True)
+        data = b''.join(self._encode(item) for item in items)
+        if not self._enforce_limit(len(data)):
+            with self._stats_lock:
+                self.stats['dropped'] += len(items)
+            return
+        # Satu file per proses agar worker gunicorn tidak saling menimpa record
+        path = os.path.join(self.log_dir, f"samples-{datetime.now():%Y%m%d}-{os.getpid()}.bin")
+        with open(path, 'ab') as f:
+            f.write(data)
+        with self._stats_lock:
+            self.stats['written'] += len(items)
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(items)
+            except OSError as e:
+                print(f"Sample logger gagal menulis: {e}")
+                with self._stats_lock:
+                    self.stats['dropped'] += len(items)
+
+    def close(self, timeout=5.0):
+        """Flush sisa queue dan hentikan writer thread"""
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+def read_samples(log_dir='logs/samples'):
+    """
+    Baca semua record sampel dari log_dir
+
+    Returns:
+        Structured array dengan field timestamp, predicted, confidence, label, pixels
+    """
+    if not os.path.isdir(log_dir):
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    records = []
+    for name in sorted(os.listdir(log_dir)):
+        if not name.endswith('.bin'):
+            continue
+        data = np.fromfile(os.path.join(log_dir, name), dtype=np.uint8)
+        # Abaikan record terakhir yang terpotong (mis. proses mati saat menulis)
+        usable = len(data) - len(data) % RECORD_SIZE
+        records.append(data[:usable].view(RECORD_DTYPE))
+    if not records:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.concatenate(records)
@@ -7,6 +7,9 @@ let isDrawing = false;
 let lastX = 0;
 let lastY = 0;
 
+// Stroke vector yang dikirim ke server (null jika canvas berisi gambar upload)
+let strokes = [];
+
 // Initialize canvas
 function initCanvas() {
     ctx.fillStyle = 'white';
@@ -34,6 +37,14 @@ function startDrawing(e) {
         lastX = (e.clientX - rect.left) * scaleX;
         lastY = (e.clientY - rect.top) * scaleY;
     }
+
+    if (strokes) {
+        strokes.push([[roundCoord(lastX), roundCoord(lastY)]]);
+    }
+}
+
+function roundCoord(value) {
+    return Math.round(value * 10) / 10;
 }
 
 function draw(e) {
@@ -61,6 +72,10 @@ function draw(e) {
     ctx.lineTo(currentX, currentY);
     ctx.stroke();
 
+    if (strokes && strokes.length > 0) {
+        strokes[strokes.length - 1].push([roundCoord(currentX), roundCoord(currentY)]);
+    }
+
     lastX = currentX;
     lastY = currentY;
 }
@@ -97,6 +112,7 @@ imageUpload.addEventListener('change', (e) => {
             img.onload = () => {
                 // Clear canvas
                 initCanvas();
+                strokes = null;
 
                 // Calculate scaling to fit image in canvas while maintaining aspect ratio
                 const scale = Math.min(canvas.width / img.width, canvas.height / img.height);
@@ -112,9 +128,13 @@ imageUpload.addEventListener('change', (e) => {
     }
 });
 
+// Payload prediksi terakhir, dikirim ulang bersama 'label' sebagai feedback
+let lastPayload = null;
+
 // Clear Button
 document.getElementById('clearBtn').addEventListener('click', () => {
     initCanvas();
+    strokes = [];
     hideResults();
     hideError();
 });
@@ -128,8 +148,18 @@ document.getElementById('predictBtn').addEventListener('click', async () => {
     showLoading();
 
     try {
-        // Get canvas image data
-        const imageData = canvas.toDataURL('image/png');
+        // Kirim stroke vector jika canvas hanya berisi gambaran tangan,
+        // selain itu (gambar upload) kirim PNG dari canvas
+        let payload;
+        if (strokes && strokes.length > 0) {
+            payload = {
+                strokes: strokes,
+                canvas_size: [canvas.width, canvas.height],
+                line_width: ctx.lineWidth
+            };
+        } else {
+            payload = { image: canvas.toDataURL('image/png') };
+        }
 
         // Send to backend
         const response = await fetch('/predict', {
@@ -137,12 +167,13 @@ document.getElementById('predictBtn').addEventListener('click', async () => {
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ image: imageData })
+            body: JSON.stringify(payload)
         });
 
         const data = await response.json();
 
         if (data.success) {
+            lastPayload = payload;
             displayResults(data);
         } else {
             showError(data.error || 'Terjadi kesalahan saat prediksi');
@@ -154,6 +185,54 @@ document.getElementById('predictBtn').addEventListener('click', async () => {
     }
 });
 
+// Feedback: kirim label yang benar untuk gambar terakhir (dipakai finetune.py)
+const feedbackLabel = document.getElementById('feedbackLabel');
+for (let i = 0; i < 26; i++) {
+    const option = document.createElement('option');
+    option.value = option.textContent = String.fromCharCode(65 + i);
+    feedbackLabel.appendChild(option);
+}
+
+async function sendFeedback(label) {
+    if (!lastPayload) {
+        return;
+    }
+    const status = document.getElementById('feedbackStatus');
+    try {
+        const response = await fetch('/predict', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ ...lastPayload, label: label })
+        });
+        const data = await response.json();
+        if (!data.success) {
+            throw new Error(data.error);
+        }
+        lastPayload = null;
+        status.textContent = `Terima kasih! Label "${label}" tersimpan.`;
+        setFeedbackEnabled(false);
+    } catch (error) {
+        console.error('Error:', error);
+        status.textContent = 'Gagal mengirim feedback.';
+    }
+}
+
+function setFeedbackEnabled(enabled) {
+    for (const id of ['feedbackCorrectBtn', 'feedbackLabel', 'feedbackSendBtn']) {
+        document.getElementById(id).disabled = !enabled;
+    }
+}
+
+document.getElementById('feedbackCorrectBtn').addEventListener('click', () => {
+    sendFeedback(document.getElementById('predictedLetter').textContent);
+});
+
+document.getElementById('feedbackSendBtn').addEventListener('click', () => {
+    sendFeedback(feedbackLabel.value);
+});
+
 // Display Functions
 function showLoading() {
     const resultsContent = document.getElementById('resultsContent');
@@ -198,6 +277,11 @@ function displayResults(data) {
     const confidencePercent = (data.confidence * 100).toFixed(1);
     document.getElementById('confidence').textContent = `${confidencePercent}% Confidence`;
 
+    // Reset feedback
+    feedbackLabel.value = data.prediction;
+    document.getElementById('feedbackStatus').textContent = '';
+    setFeedbackEnabled(true);
+
     // Update top predictions
     const topPredictions = document.getElementById('topPredictions');
     topPredictions.innerHTML = '';
@@ -221,6 +305,7 @@ function displayResults(data) {
 }
 
 function hideResults() {
+    lastPayload = null;
     document.getElementById('resultsContent').style.display = 'flex';
     document.getElementById('resultsContent').innerHTML = `
         <div class="empty-state">
@@ -0,0 +1,74 @@
+"""
+Test cascade serving (run_inference) dengan model palsu, tanpa TensorFlow
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ['SAMPLE_LOGGING'] = '0'
+
+import app  # noqa: E402
+
+
+class FakeModel:
+    """Model palsu yang selalu mengembalikan probabilitas yang sama"""
+
+    def __init__(self, predicted_class, confidence):
+        self.calls = 0
+        self.probs = np.full(26, (1 - confidence) / 25, dtype='float32')
+        self.probs[predicted_class] = confidence
+
+    def predict(self, x, verbose=0):
+        self.calls += 1
+        return self.probs[None, :]
+
+
+def _setup(monkeypatch, small_confidence):
+    full = FakeModel(predicted_class=1, confidence=0.99)
+    small = FakeModel(predicted_class=0, confidence=small_confidence)
+    monkeypatch.setattr(app, 'model', full)
+    monkeypatch.setattr(app, 'small_model', small)
+    monkeypatch.setattr(app, 'cascade_threshold', 0.9)
+    monkeypatch.setattr(app, 'cascade_stats', {'total': 0, 'escalated': 0})
+    return small, full
+
+
+def test_unsure_request_escalates_to_full_model(monkeypatch):
+    small, full = _setup(monkeypatch, small_confidence=0.5)
+
+    predictions = app.run_inference(np.zeros((1, 28, 28, 1), dtype='float32'))
+
+    assert np.argmax(predictions) == 1
+    assert small.calls == 1
+    assert full.calls == 1
+    assert app.cascade_stats == {'total': 1, 'escalated': 1}
+
+
+def test_confident_request_stops_at_small_model(monkeypatch):
+    small, full = _setup(monkeypatch, small_confidence=0.95)
+
+    predictions = app.run_inference(np.zeros((1, 28, 28, 1), dtype='float32'))
+
+    assert np.argmax(predictions) == 0
+    assert small.calls == 1
+    assert full.calls == 0
+    assert app.cascade_stats == {'total': 1, 'escalated': 0}
+
+
+def test_predict_endpoint_uses_cascade(monkeypatch):
+    small, full = _setup(monkeypatch, small_confidence=0.5)
+    client = app.app.test_client()
+
+    response = client.post('/predict', json={
+        'strokes': [[[40, 40], [240, 240]]],
+        'canvas_size': [280, 280],
+        'line_width': 15
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['prediction'] == 'B'
+    assert small.calls == 1
+    assert full.calls == 1
+    assert app.cascade_stats['total'] == 1
@@ -0,0 +1,47 @@
+"""
+Test parity NumPy engine (numpy_inference.py) terhadap Keras
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip('tensorflow')
+
+from model import create_model  # noqa: E402
+from numpy_inference import NumpyModel, export_numpy_weights  # noqa: E402
+
+
+def _randomize_batchnorm(model, rng):
+    """Statistik BatchNorm non-trivial; sebagian gamma negatif (jalur materialize)"""
+    for layer in model.layers:
+        if layer.__class__.__name__ != 'BatchNormalization':
+            continue
+        channels = layer.get_weights()[0].shape[0]
+        gamma = rng.uniform(0.5, 1.5, channels).astype('float32')
+        gamma[::4] *= -1
+        beta = rng.normal(0, 0.2, channels).astype('float32')
+        moving_mean = rng.normal(0, 0.5, channels).astype('float32')
+        moving_variance = rng.uniform(0.5, 2.0, channels).astype('float32')
+        layer.set_weights([gamma, beta, moving_mean, moving_variance])
+
+
+def test_numpy_engine_matches_keras(tmp_path):
+    rng = np.random.default_rng(0)
+    model = create_model()
+    _randomize_batchnorm(model, rng)
+    model_path = str(tmp_path / 'model.h5')
+    model.save(model_path)
+
+    npz_path = export_numpy_weights(model_path, str(tmp_path / 'model.npz'))
+    numpy_model = NumpyModel.load(npz_path)
+
+    x = rng.random((64, 28, 28, 1), dtype='float32')
+    expected = model.predict(x, verbose=0)
+    actual = numpy_model.predict(x)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=1e-4)
@@ -0,0 +1,59 @@
+"""
+Test pencatatan sampel di /predict (SAMPLE_LOGGING), tanpa TensorFlow
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ['SAMPLE_LOGGING'] = '0'
+
+import app  # noqa: E402
+
+
+STROKES = {
+    'strokes': [[[40, 40], [240, 240]]],
+    'canvas_size': [280, 280],
+    'line_width': 15
+}
+
+
+class FakeModel:
+    def predict(self, x, verbose=0):
+        return np.full((1, 26), 1 / 26, dtype='float32')
+
+
+class FakeLogger:
+    def __init__(self):
+        self.labels = []
+
+    def log(self, image, predicted, confidence, label=None):
+        self.labels.append(label)
+        return True
+
+
+def _setup(monkeypatch, mode):
+    logger = FakeLogger()
+    monkeypatch.setattr(app, 'model', FakeModel())
+    monkeypatch.setattr(app, 'small_model', None)
+    monkeypatch.setattr(app, 'sample_logger', logger)
+    monkeypatch.setattr(app, 'SAMPLE_LOGGING', mode)
+    return logger, app.app.test_client()
+
+
+def test_default_mode_logs_only_labeled_requests(monkeypatch):
+    logger, client = _setup(monkeypatch, 'labeled')
+
+    assert client.post('/predict', json=STROKES).status_code == 200
+    assert client.post('/predict', json=dict(STROKES, label='c')).status_code == 200
+
+    assert logger.labels == [2]
+
+
+def test_all_mode_logs_unlabeled_requests(monkeypatch):
+    logger, client = _setup(monkeypatch, 'all')
+
+    client.post('/predict', json=STROKES)
+
+    assert logger.labels == [None]
@@ -6,7 +6,7 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
-from model import create_model
+from model import create_model, create_small_model
 from prepare_data import load_processed_data
 import tensorflow as tf
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
@@ -40,13 +40,16 @@ def plot_training_history(history, save_path='training_history.png'):
     plt.close()
 
 
-def train_model(epochs=30, batch_size=128):
+def train_model(epochs=30, batch_size=128, small=False, data_dir='data'):
     """
     Train handwriting recognition model
     
     Args:
         epochs: Number of training epochs
         batch_size: Batch size for training
+        small: Train model kecil untuk stage pertama cascade
+               (disimpan ke models/small_model.h5)
+        data_dir: Folder processed data ('data_dedup' untuk hasil dedup_data.py)
     """
     print("="*60)
     print("HANDWRITING RECOGNITION - TRAINING")
@@ -55,7 +58,7 @@ def train_model(epochs=30, batch_size=128):
     # Load data
     print("\n[1/5] Loading processed data...")
     try:
-        X_train, X_val, X_test, y_train, y_val, y_test = load_processed_data()
+        X_train, X_val, X_test, y_train, y_val, y_test = load_processed_data(data_dir)
     except Exception as e:
         print(f"\nError loading data: {e}")
         print("Pastikan Anda sudah menjalankan 'python prepare_data.py' terlebih dahulu!")
@@ -63,7 +66,10 @@ def train_model(epochs=30, batch_size=128):
     
     # Create model
     print("\n[2/5] Creating CNN model...")
-    model = create_model()
+    model = create_small_model() if small else create_model()
+    best_path = 'models/small_model.h5' if small else 'models/best_model.h5'
+    final_path = 'models/small_final_model.h5' if small else 'models/final_model.h5'
+    history_path = 'training_history_small.png' if small else 'training_history.png'
     print(f"Model created with {model.count_params():,} parameters")
     
     # Setup callbacks
@@ -72,7 +78,7 @@ def train_model(epochs=30, batch_size=128):
     
     callbacks = [
         ModelCheckpoint(
-            'models/best_model.h5',
+            best_path,
             monitor='val_accuracy',
             save_best_only=True,
             mode='max',
@@ -106,6 +112,10 @@ def train_model(epochs=30, batch_size=128):
     )
     datagen.fit(X_train)
     
+    # Sample weight dari dedup_data.py --mode weight (jika ada)
+    w_path = os.path.join(data_dir, 'w_train.npy')
+    sample_weight = np.load(w_path) if os.path.exists(w_path) else None
+    
     # Train model
     print("\n[5/5] Training model...")
     print(f"Epochs: {epochs}, Batch size: {batch_size}")
@@ -114,7 +124,7 @@ def train_model(epochs=30, batch_size=128):
     start_time = datetime.now()
     
     history = model.fit(
-        datagen.flow(X_train, y_train, batch_size=batch_size),
+        datagen.flow(X_train, y_train, batch_size=batch_size, sample_weight=sample_weight),
         epochs=epochs,
         validation_data=(X_val, y_val),
         callbacks=callbacks,
@@ -136,13 +146,13 @@ def train_model(epochs=30, batch_size=128):
     print(f"Test Accuracy: {test_accuracy*100:.2f}%")
     
     # Save final model
-    model.save('models/final_model.h5')
+    model.save(final_path)
     print("\nModel saved:")
-    print("  - Best model: models/best_model.h5")
-    print("  - Final model: models/final_model.h5")
+    print(f"  - Best model: {best_path}")
+    print(f"  - Final model: {final_path}")
     
     # Plot training history
-    plot_training_history(history)
+    plot_training_history(history, save_path=history_path)
     
     # Print final metrics
     print("\n" + "="*60)
@@ -158,5 +168,10 @@ def train_model(epochs=30, batch_size=128):
 
 
 if __name__ == "__main__":
-    # Train model
-    model, history = train_model(epochs=10, batch_size=128)
+    import sys
+    
+    # Train model (python train.py --small untuk model stage pertama cascade,
+    # --dedup untuk training dari data_dedup/ hasil dedup_data.py)
+    small = '--small' in sys.argv
+    data_dir = 'data_dedup' if '--dedup' in sys.argv else 'data'
+    model, history = train_model(epochs=10, batch_size=128, small=small, data_dir=data_dir)
@@ -0,0 +1,341 @@
+"""
+Distributed data-parallel training (CPU) untuk Handwriting Recognition Model
+Menggunakan tf.distribute.MultiWorkerMirroredStrategy (TF collective ops)
+
+Local, N proses worker di satu mesin:
+    python train_distributed.py --workers 4
+Multi-host, jalankan di setiap host dengan --task-index berbeda (0 = chief):
+    python train_distributed.py --worker-hosts host1:12345,host2:12345 --task-index 0
+Scaling efficiency 1..N worker di localhost:
+    python train_distributed.py --workers 4 --benchmark
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
+from model import create_model
+
+
+BASE_LEARNING_RATE = 0.001
+
+
+class ThroughputCallback(tf.keras.callbacks.Callback):
+    """Catat durasi setiap epoch untuk menghitung throughput"""
+
+    def __init__(self):
+        super().__init__()
+        self.epoch_times = []
+        self._start = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_times.append(time.perf_counter() - self._start)
+
+
+def find_free_ports(count):
+    """Cari port TCP kosong di localhost untuk worker lokal"""
+    sockets, ports = [], []
+    for _ in range(count):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(('localhost', 0))
+        sockets.append(s)
+        ports.append(s.getsockname()[1])
+    for s in sockets:
+        s.close()
+    return ports
+
+
+def build_tf_config(worker_hosts, task_index):
+    """Buat TF_CONFIG untuk MultiWorkerMirroredStrategy"""
+    return json.dumps({
+        'cluster': {'worker': list(worker_hosts)},
+        'task': {'type': 'worker', 'index': task_index}
+    })
+
+
+def load_shard(task_index, num_workers, save_dir='data'):
+    """
+    Load shard training data milik worker ini dari file .npy
+
+    Training set di-shard secara strided (sampel ke-i milik worker i % N)
+    lewat memory map, jadi setiap worker hanya membaca bagiannya sendiri.
+    Validation dan test set dibaca utuh agar metrik sama di semua worker.
+
+    Returns:
+        Tuple of (X_train, X_val, X_test, y_train, y_val, y_test)
+    """
+    def load(name, shard=False):
+        arr = np.load(os.path.join(save_dir, f'{name}.npy'), mmap_mode='r')
+        if shard:
+            arr = arr[task_index::num_workers]
+        return np.ascontiguousarray(arr)
+
+    return (
+        load('X_train', shard=True), load('X_val'), load('X_test'),
+        load('y_train', shard=True), load('y_val'), load('y_test')
+    )
+
+
+def run_worker(epochs=30, batch_size=128, max_steps_per_epoch=None,
+               save_models=True, result_path=None):
+    """
+    Jalankan satu worker training; cluster dibaca dari TF_CONFIG
+
+    Args:
+        epochs: Number of training epochs
+        batch_size: Batch size per worker (global batch = batch_size * N)
+        max_steps_per_epoch: Batasi steps per epoch (untuk benchmark)
+        save_models: Simpan checkpoint/final model (hanya chief ke models/)
+        result_path: Chief menulis ringkasan JSON ke path ini
+    """
+    tf_config = json.loads(os.environ['TF_CONFIG'])
+    num_workers = len(tf_config['cluster']['worker'])
+    task_index = tf_config['task']['index']
+    is_chief = task_index == 0
+
+    # Worker lokal berbagi core: batasi thread pool agar tidak oversubscribe
+    intra_op_threads = int(os.environ.get('DIST_INTRA_OP_THREADS', 0))
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(2)
+
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+    print(f"[worker {task_index}] {num_workers} workers, replicas in sync: {strategy.num_replicas_in_sync}")
+
+    X_train, X_val, X_test, y_train, y_val, y_test = load_shard(task_index, num_workers)
+    print(f"[worker {task_index}] Training shard: {X_train.shape[0]:,} sampel")
+
+    # Linear scaling rule: batch global dan learning rate naik sebanding jumlah worker
+    global_batch_size = batch_size * num_workers
+    learning_rate = BASE_LEARNING_RATE * num_workers
+
+    # Data augmentation sama seperti train.py, per shard
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+    datagen = ImageDataGenerator(
+        rotation_range=10,
+        width_shift_range=0.1,
+        height_shift_range=0.1,
+        zoom_range=0.1,
+        shear_range=0.1
+    )
+    datagen.fit(X_train)
+
+    def generator():
+        yield from datagen.flow(X_train, y_train, batch_size=global_batch_size, seed=task_index)
+
+    # Shard sudah dilakukan manual, matikan auto-shard tf.distribute
+    options = tf.data.Options()
+    options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.OFF
+
+    train_dataset = tf.data.Dataset.from_generator(
+        generator,
+        output_signature=(
+            tf.TensorSpec(shape=(None, 28, 28, 1), dtype=tf.float32),
+            tf.TensorSpec(shape=(None, 26), dtype=tf.float32)
+        )
+    ).with_options(options)
+    val_dataset = tf.data.Dataset.from_tensor_slices((X_val, y_val)) \
+        .batch(global_batch_size).with_options(options)
+
+    # Shard bisa beda 1 sampel: semua worker harus menjalankan jumlah step yang sama
+    total_train = np.load(os.path.join('data', 'y_train.npy'), mmap_mode='r').shape[0]
+    steps_per_epoch = (total_train // num_workers) // batch_size
+    if max_steps_per_epoch:
+        steps_per_epoch = min(steps_per_epoch, max_steps_per_epoch)
+
+    with strategy.scope():
+        model = create_model(learning_rate=learning_rate)
+
+    throughput = ThroughputCallback()
+    callbacks = [throughput]
+    temp_dir = None
+    if save_models:
+        # Semua worker ikut menyimpan (butuh collective ops), hanya chief ke models/
+        if is_chief:
+            os.makedirs('models', exist_ok=True)
+            checkpoint_path = 'models/best_model.h5'
+        else:
+            temp_dir = tempfile.mkdtemp(prefix=f'worker{task_index}_')
+            checkpoint_path = os.path.join(temp_dir, 'best_model.h5')
+        callbacks += [
+            ModelCheckpoint(
+                checkpoint_path,
+                monitor='val_accuracy',
+                save_best_only=True,
+                mode='max',
+                verbose=1 if is_chief else 0
+            ),
+            EarlyStopping(
+                monitor='val_loss',
+                patience=5,
+                restore_best_weights=True,
+                verbose=1 if is_chief else 0
+            ),
+            ReduceLROnPlateau(
+                monitor='val_loss',
+                factor=0.5,
+                patience=3,
+                min_lr=1e-7,
+                verbose=1 if is_chief else 0
+            )
+        ]
+
+    if is_chief:
+        print(f"Global batch size: {global_batch_size}, learning rate: {learning_rate}")
+        print(f"Epochs: {epochs}, steps per epoch: {steps_per_epoch}")
+
+    history = model.fit(
+        train_dataset,
+        epochs=epochs,
+        steps_per_epoch=steps_per_epoch,
+        validation_data=val_dataset,
+        callbacks=callbacks,
+        verbose=1 if is_chief else 0
+    )
+
+    test_dataset = tf.data.Dataset.from_tensor_slices((X_test, y_test)) \
+        .batch(global_batch_size).with_options(options)
+    test_loss, test_accuracy = model.evaluate(test_dataset, verbose=0)
+
+    if save_models:
+        model.save('models/final_model.h5' if is_chief else os.path.join(temp_dir, 'final_model.h5'))
+    if temp_dir:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    # Epoch pertama berisi warmup (graph tracing, koneksi collective)
+    epoch_times = throughput.epoch_times[1:] or throughput.epoch_times
+    samples_per_epoch = steps_per_epoch * global_batch_size
+    samples_per_sec = samples_per_epoch / float(np.mean(epoch_times))
+
+    if is_chief:
+        print(f"Test Accuracy: {test_accuracy*100:.2f}%")
+        print(f"Throughput: {samples_per_sec:,.0f} sampel/detik")
+        if result_path:
+            with open(result_path, 'w') as f:
+                json.dump({
+                    'num_workers': num_workers,
+                    'global_batch_size': global_batch_size,
+                    'learning_rate': learning_rate,
+                    'samples_per_sec': samples_per_sec,
+                    'test_accuracy': float(test_accuracy),
+                    'best_val_accuracy': float(max(history.history['val_accuracy']))
+                }, f, indent=2)
+
+    return model, history
+
+
+def launch_local(num_workers, epochs=30, batch_size=128, max_steps_per_epoch=None,
+                 save_models=True, result_path=None):
+    """
+    Jalankan N proses worker di localhost dan tunggu sampai selesai
+
+    Returns:
+        True jika semua worker selesai tanpa error
+    """
+    ports = find_free_ports(num_workers)
+    worker_hosts = [f'localhost:{port}' for port in ports]
+    intra_op_threads = max(1, (os.cpu_count() or 1) // num_workers)
+
+    processes = []
+    for task_index in range(num_workers):
+        env = dict(os.environ)
+        env['TF_CONFIG'] = build_tf_config(worker_hosts, task_index)
+        env['DIST_INTRA_OP_THREADS'] = str(intra_op_threads)
+        env['TF_CPP_MIN_LOG_LEVEL'] = env.get('TF_CPP_MIN_LOG_LEVEL', '2')
+        cmd = [
+            sys.executable, os.path.abspath(__file__), '--run-worker',
+            '--epochs', str(epochs), '--batch-size', str(batch_size)
+        ]
+        if max_steps_per_epoch:
+            cmd += ['--steps', str(max_steps_per_epoch)]
+        if not save_models:
+            cmd += ['--no-save']
+        if result_path:
+            cmd += ['--result-path', result_path]
+        processes.append(subprocess.Popen(cmd, env=env))
+
+    return_codes = [p.wait() for p in processes]
+    if any(return_codes):
+        print(f"Worker gagal dengan return codes: {return_codes}")
+        return False
+    return True
+
+
+def benchmark_scaling(max_workers, batch_size=128, steps=50, epochs=3):
+    """
+    Ukur scaling efficiency data-parallel dari 1 sampai N worker di localhost
+
+    Efficiency = throughput(N) / (N * throughput(1)).
+    Tidak menyimpan model.
+
+    Returns:
+        List dictionary hasil per jumlah worker
+    """
+    counts = sorted({n for n in [1, 2, 4, 8, 16, 32, 64] if n < max_workers} | {1, max_workers})
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in counts:
+            print(f"\n[BENCHMARK] {n} worker(s)...")
+            result_path = os.path.join(tmp, f'result_{n}.json')
+            if not launch_local(n, epochs=epochs, batch_size=batch_size, max_steps_per_epoch=steps,
+                                save_models=False, result_path=result_path):
+                break
+            with open(result_path) as f:
+                results.append(json.load(f))
+
+    if not results:
+        return results
+
+    base = results[0]['samples_per_sec']
+    print("\n" + "="*60)
+    print("SCALING EFFICIENCY (localhost)")
+    print("="*60)
+    print(f"{'Workers':>8} {'Sampel/detik':>14} {'Speedup':>9} {'Efficiency':>11}")
+    for r in results:
+        speedup = r['samples_per_sec'] / base
+        r['speedup'] = speedup
+        r['efficiency'] = speedup / r['num_workers']
+        print(f"{r['num_workers']:>8} {r['samples_per_sec']:>14,.0f} {speedup:>8.2f}x {r['efficiency']*100:>10.1f}%")
+    print("="*60)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Distributed CPU training (MultiWorkerMirroredStrategy)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Jumlah worker lokal')
+    parser.add_argument('--worker-hosts', type=str, default=None,
+                        help='Daftar host:port semua worker (multi-host), dipisah koma')
+    parser.add_argument('--task-index', type=int, default=0,
+                        help='Index worker ini di --worker-hosts (0 = chief)')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=128, help='Batch size per worker')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Ukur scaling efficiency 1..N worker di localhost')
+    parser.add_argument('--steps', type=int, default=None, help='Maksimum steps per epoch')
+    parser.add_argument('--no-save', action='store_true', help='Jangan simpan model')
+    parser.add_argument('--result-path', type=str, default=None)
+    parser.add_argument('--run-worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_worker:
+        run_worker(args.epochs, args.batch_size, args.steps, not args.no_save, args.result_path)
+    elif args.worker_hosts:
+        os.environ['TF_CONFIG'] = build_tf_config(args.worker_hosts.split(','), args.task_index)
+        run_worker(args.epochs, args.batch_size, args.steps, not args.no_save, args.result_path)
+    elif args.benchmark:
+        benchmark_scaling(args.workers, args.batch_size, steps=args.steps or 50)
+    else:
+        launch_local(args.workers, args.epochs, args.batch_size, args.steps,
+                     not args.no_save, args.result_path)
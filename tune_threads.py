@@ -0,0 +1,231 @@
+"""
+Autotuner thread topology untuk inference di host ini
+Sweep jumlah worker gunicorn x TF intra-op x inter-op threads
+
+Setiap konfigurasi dijalankan sebagai W proses terpisah (seperti worker
+gunicorn) yang memanggil model.predict secara closed-loop. Konfigurasi
+terbaik ditulis ke models/serving_config.json, yang dibaca app.py
+(thread TF) dan gunicorn.conf.py (jumlah worker) saat startup.
+
+Batch size tidak di-sweep: app.py memproses satu gambar per request tanpa
+micro-batching, sehingga semua konfigurasi diukur dengan batch size yang
+benar-benar di-serve (SERVED_BATCH_SIZE = 1).
+
+Contoh:
+    python tune_threads.py                        # maksimum throughput
+    python tune_threads.py --slo-ms 50            # throughput terbaik dengan p99 <= 50 ms
+    python tune_threads.py --model models/small_model.h5
+"""
+
+import os
+import json
+import time
+import socket
+import argparse
+import queue
+import multiprocessing
+from datetime import datetime
+import numpy as np
+
+
+SERVING_CONFIG_PATH = 'models/serving_config.json'
+SERVED_BATCH_SIZE = 1
+STARTUP_TIMEOUT = 300.0
+
+
+def _benchmark_worker(model_path, intra_op, inter_op, batch_size, duration,
+                      ready_queue, start_event, result_queue):
+    """Satu proses worker: load model, tunggu start, lalu predict closed-loop"""
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_path)
+    x = np.random.default_rng(os.getpid()).random((batch_size, 28, 28, 1), dtype='float32')
+    for _ in range(5):
+        model.predict(x, verbose=0)
+
+    ready_queue.put(os.getpid())
+    start_event.wait()
+
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        model.predict(x, verbose=0)
+        latencies.append(time.perf_counter() - start)
+
+    result_queue.put(latencies)
+
+
+def _collect(q, processes, timeout, stage):
+    """Ambil satu item per worker dari q; gagal jika ada worker mati atau timeout"""
+    items = []
+    deadline = time.monotonic() + timeout
+    while len(items) < len(processes):
+        try:
+            items.append(q.get(timeout=1.0))
+            continue
+        except queue.Empty:
+            pass
+        dead = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+        if dead:
+            raise RuntimeError(f"Worker benchmark gagal saat {stage} (exit code {dead[0]})")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Worker benchmark tidak merespon saat {stage} dalam {timeout:.0f} detik")
+    return items
+
+
+def measure_config(model_path, workers, intra_op, inter_op, batch_size=SERVED_BATCH_SIZE, duration=5.0):
+    """
+    Ukur satu konfigurasi dengan W proses worker paralel
+
+    Returns:
+        Dictionary berisi throughput (sampel/detik) dan latency per panggilan (ms)
+
+    Raises:
+        RuntimeError: Jika worker mati atau tidak merespon dalam batas waktu
+    """
+    ctx = multiprocessing.get_context('spawn')
+    ready_queue, result_queue = ctx.Queue(), ctx.Queue()
+    start_event = ctx.Event()
+
+    processes = [
+        ctx.Process(target=_benchmark_worker, args=(
+            model_path, intra_op, inter_op, batch_size, duration,
+            ready_queue, start_event, result_queue
+        ))
+        for _ in range(workers)
+    ]
+    for p in processes:
+        p.start()
+    try:
+        _collect(ready_queue, processes, STARTUP_TIMEOUT, 'load model')
+        start_event.set()
+        latencies = []
+        for worker_latencies in _collect(result_queue, processes, duration + 60.0, 'benchmark'):
+            latencies.extend(worker_latencies)
+    finally:
+        for p in processes:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'workers': workers,
+        'intra_op_threads': intra_op,
+        'inter_op_threads': inter_op,
+        'batch_size': batch_size,
+        'throughput': len(latencies) * batch_size / duration,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99))
+    }
+
+
+def candidate_configs(cores, max_workers=None):
+    """
+    Daftar konfigurasi (workers, intra, inter) yang masuk akal untuk host ini
+
+    Total thread intra-op tidak melebihi jumlah core (tidak oversubscribe).
+    """
+    max_workers = max_workers or cores
+    worker_counts = sorted({w for w in (1, 2, 4, 8, 16, 32) if w <= max_workers} | {max_workers})
+    configs = []
+    for workers in worker_counts:
+        per_worker = max(1, cores // workers)
+        intra_values = sorted({v for v in (1, 2, 4) if v <= per_worker} | {per_worker})
+        for intra_op in intra_values:
+            for inter_op in (1, 2):
+                configs.append((workers, intra_op, inter_op))
+    return configs
+
+
+def select_best(results, slo_ms=None):
+    """
+    Pilih konfigurasi terbaik
+
+    Tanpa SLO: throughput maksimum. Dengan SLO: throughput maksimum di antara
+    konfigurasi dengan p99 <= slo_ms; jika tidak ada, p99 terendah.
+    """
+    if slo_ms is None:
+        return max(results, key=lambda r: r['throughput'])
+    within_slo = [r for r in results if r['p99_ms'] <= slo_ms]
+    if within_slo:
+        return max(within_slo, key=lambda r: r['throughput'])
+    print(f"Warning: tidak ada konfigurasi dengan p99 <= {slo_ms} ms, memilih p99 terendah")
+    return min(results, key=lambda r: r['p99_ms'])
+
+
+def run_tuning(model_path='models/best_model.h5', slo_ms=None, duration=5.0,
+               max_workers=None, output_path=SERVING_CONFIG_PATH):
+    """
+    Sweep semua konfigurasi, pilih yang terbaik, dan tulis serving config
+
+    Returns:
+        Dictionary serving config yang ditulis
+    """
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model tidak ditemukan di {model_path}")
+
+    cores = os.cpu_count() or 1
+    configs = candidate_configs(cores, max_workers)
+    print(f"Host: {socket.gethostname()}, {cores} cores, {len(configs)} konfigurasi")
+    print(f"Model: {model_path} (batch size {SERVED_BATCH_SIZE})")
+    print("-" * 65)
+    print(f"{'Workers':>8} {'Intra':>6} {'Inter':>6} {'Sampel/detik':>14} {'p50 ms':>8} {'p99 ms':>8}")
+
+    results = []
+    for workers, intra_op, inter_op in configs:
+        r = measure_config(model_path, workers, intra_op, inter_op, SERVED_BATCH_SIZE, duration)
+        results.append(r)
+        print(f"{workers:>8} {intra_op:>6} {inter_op:>6} "
+              f"{r['throughput']:>14,.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+    best = select_best(results, slo_ms)
+    config = {
+        'workers': best['workers'],
+        'intra_op_threads': best['intra_op_threads'],
+        'inter_op_threads': best['inter_op_threads'],
+        'batch_size': best['batch_size'],
+        'objective': 'latency_slo' if slo_ms is not None else 'throughput',
+        'slo_ms': slo_ms,
+        'measured': best,
+        'model_path': model_path,
+        'host': {'hostname': socket.gethostname(), 'cpu_count': cores},
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'results': results
+    }
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(config, f, indent=2)
+
+    print("-" * 65)
+    print(f"Best: workers={best['workers']}, intra_op={best['intra_op_threads']}, "
+          f"inter_op={best['inter_op_threads']}")
+    print(f"      {best['throughput']:,.0f} sampel/detik, p99 {best['p99_ms']:.2f} ms")
+    print(f"Serving config saved to: {output_path}")
+    return config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Autotune worker x intra-op x inter-op threads')
+    parser.add_argument('--model', default='models/best_model.h5', help='Path model Keras')
+    parser.add_argument('--slo-ms', type=float, default=None,
+                        help='Target p99 latency (ms); tanpa ini memaksimalkan throughput')
+    parser.add_argument('--duration', type=float, default=5.0, help='Durasi ukur per konfigurasi (detik)')
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--output', default=SERVING_CONFIG_PATH)
+    args = parser.parse_args()
+
+    run_tuning(
+        model_path=args.model,
+        slo_ms=args.slo_ms,
+        duration=args.duration,
+        max_workers=args.max_workers,
+        output_path=args.output
+    )